@@ -0,0 +1,25 @@
+from typing import Callable
+from fastapi import status
+from fastapi.responses import JSONResponse
+from loguru import logger
+from video.jobs import job_queue, QueueFullError
+
+
+def submit_job(kind: str, file_id: str, fn: Callable):
+    """
+    Queues the background job producing file_id and returns the API response.
+
+    When the queue for the job kind is full, a 429 response is returned so
+    clients can back off.
+    """
+    try:
+        job_queue.submit(kind, file_id, fn)
+    except QueueFullError as e:
+        logger.bind(file_id=file_id, kind=kind).warning("job queue full, rejecting job")
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"error": str(e)},
+            headers={"Retry-After": "30"},
+        )
+    logger.info(f"Queued {kind} job for file ID: {file_id}")
+    return {"file_id": file_id}
@@ -1,17 +1,39 @@
-from fastapi import Query, Request, status, APIRouter, UploadFile, File, Form, BackgroundTasks
+from fastapi import Depends, Query, Request, status, APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Literal, Optional
+import json
 import os
+import shutil
 from loguru import logger
 import matplotlib.font_manager as fm
 
-from video.tts import TTS
-from video.tts_chatterbox import TTSChatterbox
-from video.stt import STT
+from video.tts import TTS, KOKORO_SAMPLE_RATE
+from video.tts_chatterbox import TTSChatterbox, S3GEN_SR
+from video.audio import stream_wav
 from video.storage import Storage
 from video.caption import Caption
 from video.media import MediaUtils
 from video.builder import VideoBuilder
+from video.config import (
+    chatterbox_persist_conditioning,
+    whisper_model,
+    whisper_models,
+    video_encoder as default_video_encoder,
+)
+from video.ken_burns import KEN_BURNS_DIRECTIONS
+from video.encoders import (
+    ENCODER_PROFILES,
+    ENCODER_TUNES,
+    VIDEO_ENCODERS,
+    detect_encoders,
+    validate_encoder,
+)
+from video.jobs import job_queue
+from video.job_store import JobState, job_store, job_stage
+from video.executor import stage_executor, get_stt, transcribe as transcribe_stage
+from video.pipeline import Pipeline
+from video.cache import tts_cache, transcript_cache
+from api_server.jobs import submit_job
 from utils.image import resize_image_cover
 
 CHUNK_SIZE = 1024 * 1024 * 10  # 10MB chunks
@@ -32,22 +54,36 @@ if not os.path.exists(overlay_path):
 storage = Storage(
     storage_path=storage_path,
 )
-stt = STT()
 tts_manager = TTS()
-tts_chatterbox = TTSChatterbox()
+tts_chatterbox = TTSChatterbox(
+    conditioning_cache_dir=(
+        storage.get_cache_dir("voice_conditioning")
+        if chatterbox_persist_conditioning
+        else None
+    ),
+)
 
 @v1_media_api_router.post("/audio-tools/transcribe")
 def transcribe(
     audio_file: UploadFile = File(..., description="Audio file to transcribe"),
     language: Optional[str] = Form(None, description="Language code (optional)"),
+    parallel: Optional[bool] = Form(False, description="Split long audio on silence and transcribe the chunks in parallel (default: False)"),
+    model: Optional[str] = Form(None, description=f"Whisper model size, one of {', '.join(whisper_models)} (default: {whisper_model})"),
 ):
     """
     Transcribe audio file to text.
     """
+    if model and model not in whisper_models:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Invalid Whisper model: {model}."},
+        )
     logger.bind(language=language, filename=audio_file.filename).info(
         "Transcribing audio file"
     )
-    captions, duration = stt.transcribe(audio_file.file, beam_size=5, language=language)
+    captions, duration = get_stt(model).transcribe(
+        audio_file.file, beam_size=5, language=language, parallel=parallel
+    )
     transcription = "".join([cap["text"] for cap in captions])
 
     return {
@@ -55,6 +91,52 @@ def transcribe(
         "duration": duration,
     }
 
+@v1_media_api_router.post("/audio-tools/transcribe/stream")
+def transcribe_stream(
+    audio_file: UploadFile = File(..., description="Audio file to transcribe"),
+    language: Optional[str] = Form(None, description="Language code (optional)"),
+    model: Optional[str] = Form(None, description=f"Whisper model size, one of {', '.join(whisper_models)} (default: {whisper_model})"),
+):
+    """
+    Transcribe audio file to text, streaming the words as they are decoded.
+
+    The response is newline-delimited JSON: a first line with the duration,
+    one line per word with its timestamps, and a last line marking the end.
+    """
+    if model and model not in whisper_models:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Invalid Whisper model: {model}."},
+        )
+    logger.bind(language=language, filename=audio_file.filename).info(
+        "Transcribing audio file (streaming)"
+    )
+    # the upload is closed once the handler returns, keep a copy for the stream
+    file_extension = os.path.splitext(audio_file.filename or "")[1]
+    tmp_file_id, tmp_file_path = storage.create_media_filename_with_id(
+        media_type="tmp", file_extension=file_extension
+    )
+    with open(tmp_file_path, "wb") as f:
+        shutil.copyfileobj(audio_file.file, f)
+
+    def iter_words():
+        try:
+            words, duration = get_stt(model).transcribe_stream(
+                tmp_file_path, beam_size=5, language=language
+            )
+            yield json.dumps({"type": "info", "duration": duration}) + "\n"
+            for word in words:
+                yield json.dumps({"type": "word", **word}) + "\n"
+            yield json.dumps({"type": "done"}) + "\n"
+        except Exception as e:
+            logger.bind(error=str(e)).error("streaming transcription failed")
+            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+        finally:
+            if storage.media_exists(tmp_file_id):
+                storage.delete_media(tmp_file_id)
+
+    return StreamingResponse(iter_words(), media_type="application/x-ndjson")
+
 @v1_media_api_router.get("/audio-tools/tts/kokoro/voices")
 def get_kokoro_voices():
     voices = tts_manager.valid_kokoro_voices()
@@ -63,10 +145,10 @@ def get_kokoro_voices():
 
 @v1_media_api_router.post("/audio-tools/tts/kokoro")
 def generate_kokoro_tts(
-    background_tasks: BackgroundTasks,
     text: str = Form(..., description="Text to convert to speech"),
     voice: Optional[str] = Form(None, description="Voice name for kokoro TTS"),
     speed: Optional[float] = Form(None, description="Speed for kokoro TTS"),
+    output_format: Optional[Literal["wav", "flac", "ogg"]] = Form("wav", description="Format of the mono output audio (default: wav)"),
 ):
     """
     Generate audio from text using specified TTS engine.
@@ -80,30 +162,130 @@ def generate_kokoro_tts(
             content={"error": f"Invalid voice: {voice}. Valid voices: {voices}"},
         )
     audio_id, audio_path = storage.create_media_filename_with_id(
-        media_type="audio", file_extension=".wav"
+        media_type="audio", file_extension=f".{output_format or 'wav'}"
     )
-    tmp_file_id = storage.create_tmp_file(audio_id)
 
     def bg_task():
-        tts_manager.kokoro(
-            text=text,
-            output_path=audio_path,
-            voice=voice,
-            speed=speed if speed else 1.0,
+        with job_stage("tts"):
+            tts_manager.kokoro(
+                text=text,
+                output_path=audio_path,
+                voice=voice,
+                speed=speed if speed else 1.0,
+            )
+
+    return submit_job("tts", audio_id, bg_task)
+
+
+@v1_media_api_router.post("/audio-tools/tts/kokoro/stream")
+def stream_kokoro_tts(
+    text: str = Form(..., description="Text to convert to speech"),
+    voice: Optional[str] = Form(None, description="Voice name for kokoro TTS"),
+    speed: Optional[float] = Form(None, description="Speed for kokoro TTS"),
+):
+    """
+    Generate audio from text with kokoro, streaming a mono 16-bit WAV as the
+    audio of each sentence is generated.
+    """
+    if not voice:
+        voice = "af_heart"
+    voices = tts_manager.valid_kokoro_voices()
+    if voice not in voices:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Invalid voice: {voice}. Valid voices: {voices}"},
+        )
+    if not text.strip():
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Text cannot be empty or whitespace"},
+        )
+
+    chunks = tts_manager.kokoro_stream(
+        text=text,
+        voice=voice,
+        speed=speed if speed else 1.0,
+    )
+    return StreamingResponse(
+        stream_wav(chunks, KOKORO_SAMPLE_RATE), media_type="audio/wav"
+    )
+
+
+@v1_media_api_router.post("/audio-tools/tts/chatterbox/stream")
+def stream_chatterbox_tts(
+    text: str = Form(..., description="Text to convert to speech"),
+    sample_audio_id: Optional[str] = Form(
+        None, description="Sample audio ID for voice cloning"
+    ),
+    sample_audio_file: Optional[UploadFile] = File(
+        None, description="Sample audio file for voice cloning"
+    ),
+    exaggeration: Optional[float] = Form(
+        0.5, description="Exaggeration factor for voice cloning, default: 0.5"
+    ),
+    cfg_weight: Optional[float] = Form(0.5, description="CFG weight for voice cloning, default: 0.5"),
+    temperature: Optional[float] = Form(
+        0.8, description="Temperature for voice cloning (default: 0.8)"
+    ),
+    chunk_chars: Optional[int] = Form(1024, description="Max characters per chunk (default: 1024)"),
+    chunk_silence_ms: Optional[int] = Form(
+        350, description="Silence duration between chunks in milliseconds (default: 350)"
+    )
+):
+    """
+    Generate audio from text using Chatterbox TTS, streaming a mono 16-bit
+    WAV as each chunk is generated.
+    """
+    # checked before the sample upload, so an early return leaves no tmp file behind
+    if not text.strip():
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "Text cannot be empty or whitespace"},
+        )
+    sample_audio_path = None
+    tmp_sample_audio_id = None
+    if sample_audio_file:
+        if not sample_audio_file.filename.endswith(".wav"):
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"error": "Sample audio file must be a .wav file."},
+            )
+        tmp_sample_audio_id = storage.upload_media(
+            media_type="tmp",
+            media_data=sample_audio_file.file.read(),
+            file_extension=".wav",
         )
-        storage.delete_media(tmp_file_id)
+        sample_audio_path = storage.get_media_path(tmp_sample_audio_id)
+    elif sample_audio_id:
+        if not storage.media_exists(sample_audio_id):
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": f"Sample audio with ID {sample_audio_id} not found."},
+            )
+        sample_audio_path = storage.get_media_path(sample_audio_id)
 
-    # background_tasks.add_task(bg_task)
-    logger.info(f"Adding background task for TTS generation with ID: {audio_id}")
-    background_tasks.add_task(bg_task)
-    logger.info(f"Background task added for TTS generation with ID: {audio_id}")
+    def iter_audio():
+        try:
+            yield from tts_chatterbox.text_to_speech_stream(
+                text,
+                audio_prompt_path=sample_audio_path,
+                temperature=temperature,
+                cfg_weight=cfg_weight,
+                exaggeration=exaggeration,
+                max_chars_per_chunk=chunk_chars,
+                inter_chunk_silence_ms=chunk_silence_ms,
+            )
+        finally:
+            if tmp_sample_audio_id and storage.media_exists(tmp_sample_audio_id):
+                storage.delete_media(tmp_sample_audio_id)
 
-    return {"file_id": audio_id}
+    return StreamingResponse(
+        stream_wav(iter_audio(), S3GEN_SR), media_type="audio/wav"
+    )
 
 
 @v1_media_api_router.post("/audio-tools/tts/chatterbox")
 def generate_chatterbox_tts(
-    background_tasks: BackgroundTasks,
     text: str = Form(..., description="Text to convert to speech"),
     sample_audio_id: Optional[str] = Form(
         None, description="Sample audio ID for voice cloning"
@@ -121,13 +303,14 @@ def generate_chatterbox_tts(
     chunk_chars: Optional[int] = Form(1024, description="Max characters per chunk (default: 1024)"),
     chunk_silence_ms: Optional[int] = Form(
         350, description="Silence duration between chunks in milliseconds (default: 350)"
-    )
+    ),
+    output_format: Optional[Literal["wav", "flac", "ogg"]] = Form("wav", description="Format of the mono output audio (default: wav)"),
 ):
     """
     Generate audio from text using Chatterbox TTS.
     """
     audio_id, audio_path = storage.create_media_filename_with_id(
-        media_type="audio", file_extension=".wav"
+        media_type="audio", file_extension=f".{output_format or 'wav'}"
     )
 
     sample_audio_path = None
@@ -151,10 +334,8 @@ def generate_chatterbox_tts(
             )
         sample_audio_path = storage.get_media_path(sample_audio_id)
 
-    tmp_file_id = storage.create_tmp_file(audio_id)
-
     def bg_task():
-        try:
+        with job_stage("tts"):
             tts_chatterbox.chatterbox(
                 text=text,
                 output_path=audio_path,
@@ -165,17 +346,8 @@ def generate_chatterbox_tts(
                 chunk_chars=chunk_chars,
                 chunk_silence_ms=chunk_silence_ms,
             )
-        except Exception as e:
-            logger.error(f"Error in Chatterbox TTS: {e}")
-        finally:
-            storage.delete_media(tmp_file_id)
-
-    # background_tasks.add_task(bg_task)
-    logger.info(f"Adding background task for Chatterbox TTS generation with ID: {audio_id}")
-    background_tasks.add_task(bg_task)
-    logger.info(f"Background task added for Chatterbox TTS generation with ID: {audio_id}")
 
-    return {"file_id": audio_id}
+    return submit_job("tts", audio_id, bg_task)
 
 
 @v1_media_api_router.post("/storage")
@@ -248,17 +420,112 @@ def file_status(file_id: str):
     """
     Check the status of a file by its ID.
     """
-    tmp_id = storage.create_tmp_file_id(file_id)
-    if storage.media_exists(tmp_id):
-        return {"status": "processing"}
+    job = job_store.get(file_id)
+    if job and job["state"] == JobState.QUEUED:
+        return {
+            "status": "queued",
+            "queue_position": job_queue.queue_position(file_id),
+        }
+    elif job and job["state"] == JobState.PROCESSING:
+        return {"status": "processing", "progress": job["progress"]}
+    elif job and job["state"] == JobState.FAILED:
+        return {"status": "failed", "error": job["error"]}
     elif storage.media_exists(file_id):
         return {"status": "ready"}
     return {"status": "not_found"}
 
 
+@v1_media_api_router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """
+    Get the state, progress, stage timings and error of a background job.
+    The job ID is the file ID returned by the endpoint that created the job.
+    """
+    job = job_store.get(job_id)
+    if not job:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"error": f"Job with ID {job_id} not found."},
+        )
+    if job["state"] == JobState.QUEUED:
+        job["queue_position"] = job_queue.queue_position(job_id)
+    return job
+
+
+@v1_media_api_router.get("/cache/stats")
+def cache_stats():
+    """
+    Get the hit/miss counters of the TTS and transcript caches.
+    Counters are kept per process, so stages running in the process pool
+    are not included.
+    """
+    return {
+        "tts": tts_cache.stats(),
+        "transcripts": transcript_cache.stats(),
+    }
+
+
+@v1_media_api_router.get("/video-tools/encoders")
+def list_encoders():
+    """
+    List the encoder profiles, the video encoders available on this server and
+    the encoder tunes.
+    """
+    return {
+        "profiles": {
+            name: {encoder: " ".join(args) for encoder, args in encoders.items()}
+            for name, encoders in ENCODER_PROFILES.items()
+        },
+        "encoders": sorted(detect_encoders()),
+        "default_encoder": default_video_encoder,
+        "tunes": {encoder: list(tunes) for encoder, tunes in ENCODER_TUNES.items()},
+    }
+
+
+def encoder_form(
+    encoder_profile: Optional[str] = Form(
+        None, description=f"Encoder profile, one of {', '.join(ENCODER_PROFILES)} (default: the server's ENCODER_PROFILE, or the operation's default)"
+    ),
+    video_encoder: Optional[str] = Form(
+        None, description=f"Video encoder, one of {', '.join(VIDEO_ENCODERS)} if installed, see /video-tools/encoders (default: {default_video_encoder})"
+    ),
+    encoder_threads: Optional[int] = Form(
+        None, description="Encoder threads, 0 lets ffmpeg decide (default: the server's ENCODER_THREADS)", ge=0
+    ),
+    encoder_tune: Optional[str] = Form(
+        None, description="Encoder tune for libx264 and libx265, e.g. film or stillimage, see /video-tools/encoders (default: the server's ENCODER_TUNE)"
+    ),
+) -> dict:
+    """
+    Encoder form fields shared by the rendering endpoints, returned as keyword
+    arguments for the MediaUtils operations and VideoBuilder.set_encoder.
+    """
+    return {
+        "encoder_profile": encoder_profile,
+        "video_encoder": video_encoder,
+        "encoder_threads": encoder_threads,
+        "encoder_tune": encoder_tune,
+    }
+
+
+def encoder_error_response(encoder: dict) -> Optional[JSONResponse]:
+    """Returns a 400 response if the requested encoder settings are invalid."""
+    encoder_error = validate_encoder(
+        encoder["encoder_profile"],
+        encoder["video_encoder"],
+        encoder["encoder_threads"],
+        encoder["encoder_tune"],
+    )
+    if encoder_error:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": encoder_error},
+        )
+    return None
+
+
 @v1_media_api_router.post("/video-tools/merge")
 def merge_videos(
-    background_tasks: BackgroundTasks,
     video_ids: str = Form(..., description="List of video IDs to merge"),
     background_music_id: Optional[str] = Form(
         None, description="Background music ID (optional)"
@@ -266,10 +533,14 @@ def merge_videos(
     background_music_volume: Optional[float] = Form(
         0.5, description="Volume for background music (0.0 to 1.0)"
     ),
+    encoder: dict = Depends(encoder_form),
 ):
     """
     Merge multiple videos into one.
     """
+    encoder_error = encoder_error_response(encoder)
+    if encoder_error:
+        return encoder_error
     video_ids = video_ids.split(",") if video_ids else []
     if not video_ids:
         return JSONResponse(
@@ -303,22 +574,19 @@ def merge_videos(
 
     utils = MediaUtils()
 
-    temp_file_id = storage.create_tmp_file(merged_video_id)
-
     def bg_task():
-        utils.merge_videos(
-            video_paths=video_paths,
-            output_path=merged_video_path,
-            background_music_path=background_music_path,
-            background_music_volume=background_music_volume,
-        )
-        storage.delete_media(temp_file_id)
-
-    logger.info(f"Adding background task for video merge with ID: {merged_video_id}")
-    background_tasks.add_task(bg_task)
-    logger.info(f"Background task added for video merge with ID: {merged_video_id}")
+        with job_stage("encode"):
+            success = utils.merge_videos(
+                video_paths=video_paths,
+                output_path=merged_video_path,
+                background_music_path=background_music_path,
+                background_music_volume=background_music_volume,
+                **encoder,
+            )
+        if not success:
+            raise RuntimeError("Failed to merge videos.")
 
-    return {"file_id": merged_video_id}
+    return submit_job("render", merged_video_id, bg_task)
 
 
 @v1_media_api_router.get('/fonts')
@@ -335,7 +603,6 @@ def list_fonts():
 
 @v1_media_api_router.post("/video-tools/generate/tts-captioned-video")
 def generate_captioned_video(
-    background_tasks: BackgroundTasks,
     background_id: str = Form(..., description="Background image ID"),
     text: Optional[str] = Form(None, description="Text to generate video from"),
     width: Optional[int] = Form(1080, description="Width of the video (default: 1080)"),
@@ -354,8 +621,15 @@ def generate_captioned_video(
     language: Optional[str] = Form(
         None, description="Language code for STT (optional, e.g. 'en', 'fr', 'de'), defaults to None (auto-detect language if audio_id is provided)"
     ),
+    whisper_model_size: Optional[str] = Form(
+        None, description=f"Whisper model size used for captions, one of {', '.join(whisper_models)} (default: {whisper_model})"
+    ),
+    caption_timing: Optional[Literal["kokoro", "whisper"]] = Form(
+        "kokoro", description="Caption timing source for non-English kokoro voices: 'kokoro' (timed from the generated audio, default) or 'whisper' (transcribe the generated audio, slower)"
+    ),
     
     image_effect: Optional[str] = Form("ken_burns", description="Effect to apply to the background image, options: ken_burns, pan (default: 'ken_burns')"),
+    image_effect_direction: Optional[str] = Form(None, description=f"Direction of the image effect, for ken_burns one of {', '.join(KEN_BURNS_DIRECTIONS)} (default: zoom-to-top-left), for pan one of left-to-right, right-to-left, top-to-bottom, bottom-to-top (default: left-to-right)"),
 
     # New parameter for animation style
     caption_animation: Optional[Literal["segment", "word"]] = Form("segment", description="Animation style for captions (default: 'segment', use 'word' for karaoke-style)"),
@@ -374,6 +648,7 @@ def generate_captioned_video(
     caption_config_shadow_blur: Optional[int] = Form(15, description="Shadow blur radius (default: 15)", ge=0, le=20),
     caption_config_stroke_color: Optional[str] = Form(None, description="Stroke/outline color in hex format (default: None)"),
     caption_config_stroke_size: Optional[int] = Form(0, description="Stroke/outline size (default: 0)", ge=0, le=10),
+    encoder: dict = Depends(encoder_form),
 ):
     """
     Generate a captioned video from text and background image.
@@ -410,6 +685,14 @@ def generate_captioned_video(
     if caption_config_stroke_size is not None:
         parsed_subtitle_options['stroke_size'] = caption_config_stroke_size
     
+    if whisper_model_size and whisper_model_size not in whisper_models:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Invalid Whisper model: {whisper_model_size}."},
+        )
+    encoder_error = encoder_error_response(encoder)
+    if encoder_error:
+        return encoder_error
     if audio_id and not storage.media_exists(audio_id):
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -440,101 +723,69 @@ def generate_captioned_video(
         dimensions=dimensions,
     )
     builder.set_media_utils(MediaUtils())
+    builder.set_encoder(**encoder)
 
-    tmp_file_id = storage.create_tmp_file(output_id)
-
-    def bg_task(
-        tmp_file_id: str = tmp_file_id,
-    ):
-        tmp_file_ids = [tmp_file_id]
+    def bg_task():
+        tmp_file_ids = []
+        try:
+            render_captioned_video(tmp_file_ids)
+        finally:
+            for tmp_file_id in tmp_file_ids:
+                if storage.media_exists(tmp_file_id):
+                    storage.delete_media(tmp_file_id)
 
-        # set audio, generate captions
-        captions = None
-        tts_audio_id = audio_id
+    def render_captioned_video(tmp_file_ids: list):
         from video.tts import LANGUAGE_VOICE_MAP
         lang_config = LANGUAGE_VOICE_MAP.get(kokoro_voice, {})
         international = lang_config.get("international", False)
-        
-        if tts_audio_id:
-            audio_path = storage.get_media_path(tts_audio_id)
-            captions, _ = stt.transcribe(audio_path=audio_path, language=language)
-            builder.set_audio(audio_path)
-        # generate TTS and set audio
-        else:
+
+        # set audio, generate captions
+        def prepare_audio():
+            if audio_id:
+                audio_path = storage.get_media_path(audio_id)
+                with job_stage("stt"):
+                    captions, _ = stage_executor.run(
+                        transcribe_stage,
+                        audio_path=audio_path,
+                        language=language,
+                        model_size=whisper_model_size,
+                    )
+                return audio_path, captions
+
+            # generate TTS
             tts_audio_id, audio_path = storage.create_media_filename_with_id(
                 media_type="audio", file_extension=".wav"
             )
             tmp_file_ids.append(tts_audio_id)
-            captions, _ = tts_manager.kokoro(
-                text=text,
-                output_path=audio_path,
-                voice=kokoro_voice,
-                speed=kokoro_speed,
-            )
-            if international:
+            with job_stage("tts"):
+                captions, _ = stage_executor.run(
+                    tts_manager.kokoro,
+                    text=text,
+                    output_path=audio_path,
+                    voice=kokoro_voice,
+                    speed=kokoro_speed,
+                    # segment animation splits the chunk captions itself
+                    word_timestamps=caption_animation == "word",
+                )
+            if international and caption_timing == "whisper":
                 # use whisper to create captions
                 iso_lang_code = lang_config.get("iso639_1")
-                captions, _ = stt.transcribe(audio_path=audio_path, language=iso_lang_code)
-            
-            builder.set_audio(audio_path)
-
-        # create subtitle
-        captionsManager = Caption()
-        subtitle_id, subtitle_path = storage.create_media_filename_with_id(
-            media_type="tmp", file_extension=".ass"
-        )
-        tmp_file_ids.append(subtitle_id)
-        
-        # --- MODIFICATION START ---
-        # Decide which data to pass to create_subtitle based on animation style
-        captions_data_for_renderer = captions
-        if caption_animation == "segment":
-            # For segment animation, create segments first
-            if international:
-                captions_data_for_renderer = captionsManager.create_subtitle_segments_international(
-                    captions=captions,
-                    lines=parsed_subtitle_options.get('lines', 1),
-                    max_length=parsed_subtitle_options.get('max_length', 1),
-                )
-            else:
-                captions_data_for_renderer = captionsManager.create_subtitle_segments_english(
-                    captions=captions,
-                    lines=parsed_subtitle_options.get('lines', 1),
-                    max_length=parsed_subtitle_options.get('max_length', 1),
-                )
-        # For "word" animation, we pass the raw `captions` list directly
-
-        captionsManager.create_subtitle(
-            segments=captions_data_for_renderer, # Use the decided data
-            output_path=subtitle_path,
-            dimensions=dimensions,
-            animation_style=caption_animation, # Pass the new style parameter
-
-            # Pass other options
-            font_size=parsed_subtitle_options.get('font_size', 120),
-            shadow_blur=parsed_subtitle_options.get('shadow_blur', 10),
-            stroke_size=parsed_subtitle_options.get('stroke_size', 5),
-            shadow_color=parsed_subtitle_options.get('shadow_color', "#000"),
-            stroke_color=parsed_subtitle_options.get('stroke_color', "#000"),
-            font_name=parsed_subtitle_options.get('font_name', "Arial"),
-            font_bold=parsed_subtitle_options.get('font_bold', True),
-            font_italic=parsed_subtitle_options.get('font_italic', False),
-            subtitle_position=parsed_subtitle_options.get('subtitle_position', "top"),
-            font_color=parsed_subtitle_options.get('font_color', "#fff"),
-            shadow_transparency=parsed_subtitle_options.get('shadow_transparency', 0.4),
-            max_length=parsed_subtitle_options.get('max_length', 25),
-            lines=parsed_subtitle_options.get('lines', 1)
-        )
-        # --- MODIFICATION END ---
-        builder.set_captions(
-            file_path=subtitle_path,
-        )
+                with job_stage("stt"):
+                    captions, _ = stage_executor.run(
+                        transcribe_stage,
+                        audio_path=audio_path,
+                        language=iso_lang_code,
+                        model_size=whisper_model_size,
+                    )
+            return audio_path, captions
 
         # resize background image if needed
-        background_path = storage.get_media_path(background_id)
-        utils = MediaUtils()
-        info = utils.get_video_info(background_path)
-        if info.get("width", 0) != width or info.get("height", 0) != height:
+        def prepare_background():
+            background_path = storage.get_media_path(background_id)
+            info = MediaUtils().get_video_info(background_path)
+            if info.get("width", 0) == width and info.get("height", 0) == height:
+                return background_path
+
             logger.bind(
                 image_width=info.get("width", 0),
                 image_height=info.get("height", 0),
@@ -543,44 +794,115 @@ def generate_captioned_video(
             ).debug(
                 "Resizing background image to fit video dimensions"
             )
-            _, resized_background_path = storage.create_media_filename_with_id(
+            resized_background_id, resized_background_path = storage.create_media_filename_with_id(
                 media_type="image", file_extension=".jpg"
-            )   
-            resize_image_cover(
-                image_path=background_path,
-                output_path=resized_background_path,
-                target_width=width,
-                target_height=height,
             )
-            background_path = resized_background_path
-
-        builder.set_background_image(
-            background_path,
-            effect_config={
-                "effect": image_effect,
-            }
-        )
-
-        builder.set_output_path(output_path)
-
-        builder.execute()
-
-        for tmp_file_id in tmp_file_ids:
-            if storage.media_exists(tmp_file_id):
-                storage.delete_media(tmp_file_id)
+            tmp_file_ids.append(resized_background_id)
+            with job_stage("background"):
+                stage_executor.run(
+                    resize_image_cover,
+                    image_path=background_path,
+                    output_path=resized_background_path,
+                    target_width=width,
+                    target_height=height,
+                )
+            return resized_background_path
+
+        # libass silently falls back to another font, so surface it early
+        def check_font():
+            font_name = parsed_subtitle_options.get('font_name', "Arial")
+            try:
+                fm.findfont(fm.FontProperties(family=font_name), fallback_to_default=False)
+            except ValueError:
+                logger.bind(font_name=font_name).warning(
+                    "subtitle font not installed, the renderer will fall back to a default font"
+                )
 
-    logger.info(f"Adding background task for captioned video generation with ID: {output_id}")
-    background_tasks.add_task(bg_task, tmp_file_id=tmp_file_id)
-    logger.info(f"Background task added for captioned video generation with ID: {output_id}")
+        # create subtitle
+        def create_subtitle(audio):
+            _, captions = audio
+            with job_stage("subtitle"):
+                captionsManager = Caption()
+                subtitle_id, subtitle_path = storage.create_media_filename_with_id(
+                    media_type="tmp", file_extension=".ass"
+                )
+                tmp_file_ids.append(subtitle_id)
+
+                # --- MODIFICATION START ---
+                # Decide which data to pass to create_subtitle based on animation style
+                captions_data_for_renderer = captions
+                if caption_animation == "segment":
+                    # For segment animation, create segments first
+                    if international:
+                        captions_data_for_renderer = captionsManager.create_subtitle_segments_international(
+                            captions=captions,
+                            lines=parsed_subtitle_options.get('lines', 1),
+                            max_length=parsed_subtitle_options.get('max_length', 1),
+                        )
+                    else:
+                        captions_data_for_renderer = captionsManager.create_subtitle_segments_english(
+                            captions=captions,
+                            lines=parsed_subtitle_options.get('lines', 1),
+                            max_length=parsed_subtitle_options.get('max_length', 1),
+                        )
+                # For "word" animation, we pass the raw `captions` list directly
+
+                stage_executor.run(
+                    captionsManager.create_subtitle,
+                    segments=captions_data_for_renderer, # Use the decided data
+                    output_path=subtitle_path,
+                    dimensions=dimensions,
+                    animation_style=caption_animation, # Pass the new style parameter
+
+                    # Pass other options
+                    font_size=parsed_subtitle_options.get('font_size', 120),
+                    shadow_blur=parsed_subtitle_options.get('shadow_blur', 10),
+                    stroke_size=parsed_subtitle_options.get('stroke_size', 5),
+                    shadow_color=parsed_subtitle_options.get('shadow_color', "#000"),
+                    stroke_color=parsed_subtitle_options.get('stroke_color', "#000"),
+                    font_name=parsed_subtitle_options.get('font_name', "Arial"),
+                    font_bold=parsed_subtitle_options.get('font_bold', True),
+                    font_italic=parsed_subtitle_options.get('font_italic', False),
+                    subtitle_position=parsed_subtitle_options.get('subtitle_position', "top"),
+                    font_color=parsed_subtitle_options.get('font_color', "#fff"),
+                    shadow_transparency=parsed_subtitle_options.get('shadow_transparency', 0.4),
+                    max_length=parsed_subtitle_options.get('max_length', 25),
+                    lines=parsed_subtitle_options.get('lines', 1)
+                )
+                # --- MODIFICATION END ---
+            return subtitle_path
 
-    return {
-        "file_id": output_id,
-    }
+        def encode(audio, subtitle, background):
+            audio_path, _ = audio
+            builder.set_audio(audio_path)
+            builder.set_captions(
+                file_path=subtitle,
+            )
+            effect_config = {"effect": image_effect}
+            if image_effect_direction:
+                effect_config["direction"] = image_effect_direction
+            builder.set_background_image(background, effect_config=effect_config)
+            builder.set_output_path(output_path)
+
+            with job_stage("encode"):
+                success = builder.execute()
+            if not success:
+                raise RuntimeError("Failed to render captioned video.")
+
+        # audio, background and font checks don't depend on each other
+        pipeline = Pipeline("captioned-video", max_workers=3)
+        pipeline.add("audio", prepare_audio)
+        pipeline.add("background", prepare_background)
+        pipeline.add("font", check_font)
+        pipeline.add("subtitle", create_subtitle, depends_on=["audio"])
+        pipeline.add("encode", encode, depends_on=["audio", "subtitle", "background"])
+        pipeline.run()
+
+    return submit_job("render", output_id, bg_task)
 
 # https://ffmpeg.org/ffmpeg-filters.html#colorkey
 @v1_media_api_router.post("/video-tools/add-colorkey-overlay")
 def add_colorkey_overlay(
-    background_tasks: BackgroundTasks,
     video_id: str = Form(..., description="Video ID to overlay"),
     overlay_video_id: str = Form(..., description="Overlay image ID"),
     color: Optional[str] =  Form(
@@ -592,10 +914,14 @@ def add_colorkey_overlay(
     blend: Optional[float] = Form(
         0.2, description="Set how the alpha value for pixels that fall outside the similarity radius is computed (default: 0.2)"
     ),
+    encoder: dict = Depends(encoder_form),
 ):
     """
     Overlay a video on a video with the specified colorkey and intensity
     """
+    encoder_error = encoder_error_response(encoder)
+    if encoder_error:
+        return encoder_error
     
     if not storage.media_exists(video_id):
         return JSONResponse(
@@ -615,38 +941,36 @@ def add_colorkey_overlay(
         media_type="video", file_extension=".mp4"
     )
     
-    tmp_file_id = storage.create_tmp_file(output_id)
-    
     def bg_task():
         utils = MediaUtils()
-        utils.colorkey_overlay(
-            input_video_path=video_path,
-            overlay_video_path=overlay_video_path,
-            output_video_path=output_path,
-            color=color,
-            similarity=similarity,
-            blend=blend,
-        )
-        storage.delete_media(tmp_file_id)
-    
-    logger.info(f"Adding background task for colorkey overlay with ID: {output_id}")
-    background_tasks.add_task(bg_task)
-    logger.info(f"Background task added for colorkey overlay with ID: {output_id}")
+        with job_stage("encode"):
+            success = utils.colorkey_overlay(
+                input_video_path=video_path,
+                overlay_video_path=overlay_video_path,
+                output_video_path=output_path,
+                color=color,
+                similarity=similarity,
+                blend=blend,
+                **encoder,
+            )
+        if not success:
+            raise RuntimeError("Failed to add colorkey overlay.")
     
-    return {
-        "file_id": output_id,
-    }
+    return submit_job("render", output_id, bg_task)
 
 @v1_media_api_router.post("/video-tools/apply-vintage-filter")
 def apply_vintage_filter(
-    background_tasks: BackgroundTasks,
     video_id: str = Form(..., description="The ID of the video to apply the filter to"),
     grain_strength: Optional[int] = Form(8, description="Strength of the film grain (0-50, default: 8)"),
     vignette_intensity: Optional[float] = Form(0.1, description="Intensity of the vignette effect (0.0-1.0, default: 0.1)"),
+    encoder: dict = Depends(encoder_form),
 ):
     """
     Apply a vintage film grain and vignette filter to a video.
     """
+    encoder_error = encoder_error_response(encoder)
+    if encoder_error:
+        return encoder_error
     if not storage.media_exists(video_id):
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -657,23 +981,20 @@ def apply_vintage_filter(
     output_id, output_path = storage.create_media_filename_with_id(
         media_type="video", file_extension=".mp4"
     )
-    tmp_file_id = storage.create_tmp_file(output_id)
-
     def bg_task():
         utils = MediaUtils()
-        utils.apply_vintage_filter(
-            input_path=video_path,
-            output_path=output_path,
-            grain_strength=grain_strength,
-            vignette_intensity=vignette_intensity,
-        )
-        storage.delete_media(tmp_file_id)
-
-    logger.info(f"Adding background task for vintage filter with ID: {output_id}")
-    background_tasks.add_task(bg_task)
-    logger.info(f"Background task added for vintage filter with ID: {output_id}")
+        with job_stage("encode"):
+            success = utils.apply_vintage_filter(
+                input_path=video_path,
+                output_path=output_path,
+                grain_strength=grain_strength,
+                vignette_intensity=vignette_intensity,
+                **encoder,
+            )
+        if not success:
+            raise RuntimeError("Failed to apply vintage filter.")
 
-    return {"file_id": output_id}
+    return submit_job("render", output_id, bg_task)
 
 @v1_media_api_router.get("/video-tools/extract-frame/{video_id}")
 def extract_frame(
@@ -829,7 +1150,6 @@ def list_overlays():
 
 @v1_media_api_router.post("/video-tools/apply-overlay")
 def apply_overlay(
-    background_tasks: BackgroundTasks,
     video_id: str = Form(..., description="The ID of the video to apply the overlay to"),
     overlay_name: str = Form(..., description="The name of the overlay to apply (see /video-tools/overlays)"),
     overlay_opacity: Optional[float] = Form(0.7, description="Opacity of the overlay (0.0-1.0, default: 0.7)"),
@@ -837,10 +1157,14 @@ def apply_overlay(
     colorkey_color: Optional[str] = Form("black", description="Color to make transparent (default: 'black')"),
     colorkey_similarity: Optional[float] = Form(0.1, description="Similarity threshold for color removal (0.0-1.0, default: 0.1)"),
     colorkey_blend: Optional[float] = Form(0.1, description="Blend factor for color removal (0.0-1.0, default: 0.1)"),
+    encoder: dict = Depends(encoder_form),
 ):
     """
     Apply a video overlay to a video from the available assets.
     """
+    encoder_error = encoder_error_response(encoder)
+    if encoder_error:
+        return encoder_error
     if not storage.media_exists(video_id):
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -858,27 +1182,266 @@ def apply_overlay(
     output_id, output_path = storage.create_media_filename_with_id(
         media_type="video", file_extension=".mp4"
     )
-    tmp_file_id = storage.create_tmp_file(output_id)
-
     def bg_task():
-        try:
-            utils = MediaUtils()
-            # Use the dedicated colorkey overlay pipeline for more robust compositing
-            utils.colorkey_overlay(
+        utils = MediaUtils()
+        # Use the dedicated colorkey overlay pipeline for more robust compositing
+        with job_stage("encode"):
+            success = utils.colorkey_overlay(
                 input_video_path=video_path,
                 overlay_video_path=overlay_file_path,
                 output_video_path=output_path,
                 color=colorkey_color,
                 similarity=colorkey_similarity,
                 blend=colorkey_blend,
+                **encoder,
             )
-        except Exception as e:
-            logger.error(f"Error applying overlay in background task: {e}")
-        finally:
-            storage.delete_media(tmp_file_id)
+        if not success:
+            raise RuntimeError("Failed to apply video overlay.")
+
+    return submit_job("render", output_id, bg_task)
+
+
+def parse_pipeline_operations(operations_json: str) -> tuple[list, Optional[str]]:
+    """
+    Parses and validates the operations of /video-tools/pipeline, resolving
+    media IDs and overlay names to paths.
 
-    logger.info(f"Adding background task for video overlay with ID: {output_id}")
-    background_tasks.add_task(bg_task)
-    logger.info(f"Background task added for video overlay with ID: {output_id}")
+    Returns:
+        tuple[list, Optional[str]]: The operations for MediaUtils.render_pipeline
+        (captions without a subtitle_path are generated by the job), and an
+        error message if the operations are invalid.
+    """
+    try:
+        operations = json.loads(operations_json or "[]")
+    except ValueError as e:
+        return [], f"Invalid operations JSON: {e}"
+    if not isinstance(operations, list) or not all(isinstance(op, dict) for op in operations):
+        return [], "Operations must be a JSON list of objects."
+
+    resolved = []
+    for operation in operations:
+        operation_type = operation.get("type")
+        if operation_type == "captions":
+            subtitle_id = operation.get("subtitle_id")
+            if subtitle_id:
+                if not storage.media_exists(subtitle_id):
+                    return [], f"Subtitle with ID {subtitle_id} not found."
+                resolved.append({"type": "captions", "subtitle_path": storage.get_media_path(subtitle_id)})
+                continue
+            whisper_model_size = operation.get("whisper_model")
+            if whisper_model_size and whisper_model_size not in whisper_models:
+                return [], f"Invalid Whisper model: {whisper_model_size}."
+            animation = operation.get("animation", "segment")
+            if animation not in ("segment", "word"):
+                return [], "Caption animation must be 'segment' or 'word'."
+            language = operation.get("language")
+            if language is not None and not isinstance(language, str):
+                return [], "Caption language must be a language code."
+            subtitle_position = operation.get("subtitle_position", "center")
+            if subtitle_position not in ("top", "center", "bottom"):
+                return [], "Caption subtitle_position must be 'top', 'center' or 'bottom'."
+            font_color = str(operation.get("font_color", "#fff"))
+            # raises ValueError for colors that are not in hex format
+            Caption.hex_to_ass(font_color)
+            caption_options = {
+                "type": "captions",
+                "language": language,
+                "whisper_model": whisper_model_size,
+                "animation": animation,
+                "font_name": str(operation.get("font_name", "Arial")),
+                "font_color": font_color,
+                "subtitle_position": subtitle_position,
+            }
+            # same limits as the caption_config fields of /video-tools/generate/tts-captioned-video
+            for name, default, minimum, maximum in (
+                ("font_size", 120, 8, 200),
+                ("lines", 1, 1, 5),
+                ("max_length", 25, 1, 200),
+            ):
+                value = int(operation.get(name, default))
+                if not minimum <= value <= maximum:
+                    return [], f"Caption {name} must be between {minimum} and {maximum}."
+                caption_options[name] = value
+            resolved.append(caption_options)
+        elif operation_type == "vintage":
+            resolved.append(
+                {
+                    "type": "vintage",
+                    "grain_strength": int(operation.get("grain_strength", 8)),
+                    "vignette_intensity": float(operation.get("vignette_intensity", 0.1)),
+                }
+            )
+        elif operation_type == "overlay":
+            overlay_name = operation.get("overlay_name")
+            overlay_video_id = operation.get("overlay_video_id")
+            if overlay_name:
+                if "/" in overlay_name or "\\" in overlay_name or ".." in overlay_name:
+                    return [], f"Invalid overlay name: {overlay_name}."
+                overlay_file_path = os.path.join(overlay_path, f"{overlay_name}.mp4")
+                if not os.path.exists(overlay_file_path):
+                    return [], f"Overlay '{overlay_name}' not found."
+            elif overlay_video_id and storage.media_exists(overlay_video_id):
+                overlay_file_path = storage.get_media_path(overlay_video_id)
+            else:
+                return [], "Overlay operations need an existing overlay_name or overlay_video_id."
+            resolved.append(
+                {
+                    "type": "overlay",
+                    "overlay_path": overlay_file_path,
+                    "color": operation.get("color", "black"),
+                    "similarity": float(operation.get("similarity", 0.15)),
+                    "blend": float(operation.get("blend", 0.2)),
+                }
+            )
+        elif operation_type == "music":
+            audio_id = operation.get("audio_id")
+            if not audio_id or not storage.media_exists(audio_id):
+                return [], f"Background music with ID {audio_id} not found."
+            resolved.append(
+                {
+                    "type": "music",
+                    "audio_path": storage.get_media_path(audio_id),
+                    "volume": float(operation.get("volume", 0.5)),
+                }
+            )
+        else:
+            return [], f"Invalid operation type: {operation_type}. Use captions, vintage, overlay or music."
+    return resolved, None
+
+
+@v1_media_api_router.post("/video-tools/pipeline")
+def render_video_pipeline(
+    video_ids: str = Form(..., description="Comma separated video IDs, merged in order"),
+    operations: str = Form(
+        "[]",
+        description=(
+            "JSON list of operations applied in order to the merged video: "
+            '{"type": "captions"} (transcribed with Whisper; options: language, whisper_model, animation, '
+            "font_name, font_size, font_color, subtitle_position, max_length, lines) or "
+            '{"type": "captions", "subtitle_id": "..."}, '
+            '{"type": "vintage", "grain_strength": 8, "vignette_intensity": 0.1}, '
+            '{"type": "overlay", "overlay_name": "...", "color": "black", "similarity": 0.15, "blend": 0.2} '
+            '(or "overlay_video_id"), '
+            '{"type": "music", "audio_id": "...", "volume": 0.5}'
+        ),
+    ),
+    encoder: dict = Depends(encoder_form),
+):
+    """
+    Merge videos and apply captions, vintage filter, overlays and background
+    music in a single ffmpeg pass. Chaining the individual endpoints decodes
+    and re-encodes the video once per step; the pipeline encodes it once.
+    """
+    video_ids = video_ids.split(",") if video_ids else []
+    if not video_ids:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": "At least one video ID is required."},
+        )
+    video_paths = []
+    for video_id in video_ids:
+        if not storage.media_exists(video_id):
+            return JSONResponse(
+                status_code=status.HTTP_404_NOT_FOUND,
+                content={"error": f"Video with ID {video_id} not found."},
+            )
+        video_paths.append(storage.get_media_path(video_id))
+
+    encoder_error = encoder_error_response(encoder)
+    if encoder_error:
+        return encoder_error
+    try:
+        parsed_operations, operations_error = parse_pipeline_operations(operations)
+    except (TypeError, ValueError) as e:
+        parsed_operations, operations_error = [], f"Invalid operation option: {e}"
+    if operations_error:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": operations_error},
+        )
+
+    output_id, output_path = storage.create_media_filename_with_id(
+        media_type="video", file_extension=".mp4"
+    )
+
+    def create_captions(options: dict, tmp_file_ids: list) -> str:
+        utils = MediaUtils()
+        language = options.get("language")
+        captions = []
+        offset = 0.0
+        # transcribe every clip with audio, shifted to its place in the timeline
+        for video_path in video_paths:
+            if utils.has_audio(video_path):
+                with job_stage("stt"):
+                    words, _ = stage_executor.run(
+                        transcribe_stage,
+                        audio_path=video_path,
+                        language=language,
+                        model_size=options.get("whisper_model"),
+                    )
+                captions.extend(
+                    {**word, "start_ts": word["start_ts"] + offset, "end_ts": word["end_ts"] + offset}
+                    for word in words
+                )
+            offset += utils.get_video_info(video_path).get("duration", 0)
+
+        first_video_info = utils.get_video_info(video_paths[0])
+        dimensions = (first_video_info["width"], first_video_info["height"])
+        animation = options.get("animation", "segment")
+        lines = options.get("lines", 1)
+        max_length = options.get("max_length", 25)
+
+        with job_stage("subtitle"):
+            captions_manager = Caption()
+            if animation == "segment":
+                if language and language != "en":
+                    captions = captions_manager.create_subtitle_segments_international(
+                        captions=captions, lines=lines, max_length=max_length
+                    )
+                else:
+                    captions = captions_manager.create_subtitle_segments_english(
+                        captions=captions, lines=lines, max_length=max_length
+                    )
+            subtitle_id, subtitle_path = storage.create_media_filename_with_id(
+                media_type="tmp", file_extension=".ass"
+            )
+            tmp_file_ids.append(subtitle_id)
+            stage_executor.run(
+                captions_manager.create_subtitle,
+                segments=captions,
+                output_path=subtitle_path,
+                dimensions=dimensions,
+                animation_style=animation,
+                font_size=options.get("font_size", 120),
+                font_name=options.get("font_name", "Arial"),
+                font_color=options.get("font_color", "#fff"),
+                subtitle_position=options.get("subtitle_position", "center"),
+                max_length=max_length,
+                lines=lines,
+            )
+        return subtitle_path
+
+    def bg_task():
+        tmp_file_ids = []
+        try:
+            render_operations = [
+                {"type": "captions", "subtitle_path": create_captions(operation, tmp_file_ids)}
+                if operation["type"] == "captions" and "subtitle_path" not in operation
+                else operation
+                for operation in parsed_operations
+            ]
+            with job_stage("encode"):
+                success = MediaUtils().render_pipeline(
+                    video_paths=video_paths,
+                    operations=render_operations,
+                    output_path=output_path,
+                    **encoder,
+                )
+            if not success:
+                raise RuntimeError("Failed to render video pipeline.")
+        finally:
+            for tmp_file_id in tmp_file_ids:
+                if storage.media_exists(tmp_file_id):
+                    storage.delete_media(tmp_file_id)
 
-    return {"file_id": output_id}
+    return submit_job("render", output_id, bg_task)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Ken Burns background per direction: ffmpeg's zoompan on the
+looped image against frames rendered from a single decode of the image and
+piped to ffmpeg. zoompan only supports the top-left, top and center
+directions, the others fall back to top-left.
+Inputs are generated with ffmpeg's lavfi sources.
+Run from the repository root: python benchmarks/ken_burns.py
+Edit the CONFIG dictionary below to change the duration and directions.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.builder import VideoBuilder  # noqa: E402
+from video.ken_burns import KEN_BURNS_DIRECTIONS  # noqa: E402
+from video.media import MediaUtils  # noqa: E402
+
+CONFIG = {
+    "dimensions": (1080, 1920),
+    # the captioned video endpoint resizes backgrounds to the output size
+    "image_size": (1080, 1920),
+    "duration": 20,  # seconds, below RENDER_SEGMENT_MIN_DURATION
+    "zoom_factor": 0.001,
+    "directions": list(KEN_BURNS_DIRECTIONS),
+    "methods": ["zoompan", "frames"],
+}
+
+
+def make_inputs(tmp_dir: str) -> dict:
+    image_width, image_height = CONFIG["image_size"]
+    inputs = {
+        "audio": os.path.join(tmp_dir, "audio.wav"),
+        "image": os.path.join(tmp_dir, "background.png"),
+    }
+    commands = [
+        ["-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=24000:duration={CONFIG['duration']}", inputs["audio"]],
+        ["-f", "lavfi", "-i", f"testsrc2=size={image_width}x{image_height}", "-frames:v", "1", inputs["image"]],
+    ]
+    for args in commands:
+        subprocess.run(["ffmpeg", "-y", "-v", "error", *args], check=True)
+    return inputs
+
+
+def render(inputs: dict, direction: str, method: str, output_path: str) -> float:
+    builder = VideoBuilder(dimensions=CONFIG["dimensions"])
+    builder.set_media_utils(MediaUtils())
+    builder.set_background_image(
+        inputs["image"],
+        {
+            "effect": "ken_burns",
+            "zoom_factor": CONFIG["zoom_factor"],
+            "direction": direction,
+            "method": method,
+        },
+    )
+    builder.set_audio(inputs["audio"])
+    builder.set_output_path(output_path)
+    start = time.time()
+    assert builder.execute()
+    return time.time() - start
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        inputs = make_inputs(tmp_dir)
+        output_path = os.path.join(tmp_dir, "out.mp4")
+        print(f"{CONFIG['duration']}s at {CONFIG['dimensions']}")
+        for direction in CONFIG["directions"]:
+            timings = {method: render(inputs, direction, method, output_path) for method in CONFIG["methods"]}
+            line = "  ".join(f"{method}={elapsed:.2f}s" for method, elapsed in timings.items())
+            speedup = timings["zoompan"] / timings["frames"]
+            print(f"  {direction:<22} {line}  (x{speedup:.2f})")
+
+
+if __name__ == "__main__":
+    main()
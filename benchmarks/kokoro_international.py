@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark international Kokoro synthesis: the sentence-by-sentence loop
+against the parallel path (sequential G2P, concurrent inference).
+Run from the repository root: python benchmarks/kokoro_international.py
+Edit the CONFIG dictionary below to change the voice, text and workers.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.tts import TTS  # noqa: E402
+
+CONFIG = {
+    "voice": "ef_dora",
+    "text": " ".join(
+        [
+            "La ciudad despertó lentamente bajo un cielo gris.",
+            "Los comerciantes abrían sus puertas mientras el café llenaba el aire.",
+            "Nadie sabía que aquel día cambiaría la historia del barrio.",
+            "Un viejo reloj marcó las ocho con un sonido metálico.",
+        ]
+        * 4
+    ),
+    "speed": 1.0,
+    "workers": [1, 2, 4],
+    "repeats": 3,
+}
+
+
+def run(tts: TTS, workers: int) -> float:
+    timings = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "out.wav")
+        for _ in range(CONFIG["repeats"]):
+            start = time.time()
+            tts.kokoro_international(
+                CONFIG["text"],
+                output_path,
+                CONFIG["voice"],
+                lang_code=None,
+                speed=CONFIG["speed"],
+                workers=workers,
+            )
+            timings.append(time.time() - start)
+    return min(timings)
+
+
+def main():
+    tts = TTS()
+    # warm up the model, pipeline and voice
+    run(tts, 1)
+    baseline = None
+    for workers in CONFIG["workers"]:
+        best = run(tts, workers)
+        baseline = baseline or best
+        print(f"workers={workers}: {best:.2f}s (x{baseline / best:.2f} vs sequential)")
+
+
+if __name__ == "__main__":
+    main()
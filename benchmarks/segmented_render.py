@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark VideoBuilder renders: a single ffmpeg process against the
+segmented mode (keyframe-aligned segments encoded in parallel, joined with
+stream copy). Inputs are generated with ffmpeg's lavfi sources and a
+generated ASS caption file, so only ffmpeg is needed. Set RENDER_SEGMENT_THREADS to change the encoder threads
+of each segment worker.
+Run from the repository root: python benchmarks/segmented_render.py
+Edit the CONFIG dictionary below to change the duration and workers.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.builder import VideoBuilder  # noqa: E402
+from video.media import MediaUtils  # noqa: E402
+
+CONFIG = {
+    "dimensions": (1080, 1920),
+    "duration": 120,  # seconds
+    # "zoompan" is a Ken Burns image background rendered with ffmpeg's zoompan, with captions
+    "backgrounds": ["video", "image", "zoompan"],
+    "workers": [2, 4, 8],
+}
+
+
+def make_inputs(tmp_dir: str) -> dict:
+    width, height = CONFIG["dimensions"]
+    duration = CONFIG["duration"]
+    inputs = {
+        "audio": os.path.join(tmp_dir, "audio.wav"),
+        "video": os.path.join(tmp_dir, "background.mp4"),
+        "image": os.path.join(tmp_dir, "background.png"),
+        "captions": os.path.join(tmp_dir, "captions.ass"),
+    }
+    commands = [
+        ["-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=24000:duration={duration}", inputs["audio"]],
+        ["-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate=30:duration={duration}",
+         "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p", inputs["video"]],
+        ["-f", "lavfi", "-i", f"testsrc2=size={width * 2}x{height * 2}", "-frames:v", "1", inputs["image"]],
+    ]
+    for args in commands:
+        subprocess.run(["ffmpeg", "-y", "-v", "error", *args], check=True)
+    write_captions(inputs["captions"], duration)
+    return inputs
+
+
+def ass_time(seconds: float) -> str:
+    return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{seconds % 60:05.2f}"
+
+
+def write_captions(path: str, duration: float):
+    """Writes one two-second caption after another over the whole duration."""
+    width, height = CONFIG["dimensions"]
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, OutlineColour, BorderStyle, Outline, Alignment",
+        "Style: Default,Arial,80,&H00FFFFFF,&H00000000,1,4,5",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Text",
+    ]
+    for index, start in enumerate(range(0, int(duration), 2)):
+        lines.append(f"Dialogue: 0,{ass_time(start)},{ass_time(start + 2)},Default,caption {index}")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def make_builder(inputs: dict, background: str, output_path: str) -> VideoBuilder:
+    builder = VideoBuilder(dimensions=CONFIG["dimensions"])
+    builder.set_media_utils(MediaUtils())
+    if background == "video":
+        builder.set_background_video(inputs["video"])
+    elif background == "zoompan":
+        builder.set_background_image(
+            inputs["image"], {"effect": "ken_burns", "direction": "zoom-to-center", "method": "zoompan"}
+        )
+        builder.set_captions(inputs["captions"])
+    else:
+        builder.set_background_image(inputs["image"], {"effect": "pan", "direction": "left-to-right"})
+    builder.set_audio(inputs["audio"])
+    builder.set_output_path(output_path)
+    return builder
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        inputs = make_inputs(tmp_dir)
+        output_path = os.path.join(tmp_dir, "out.mp4")
+        for background in CONFIG["backgrounds"]:
+            print(f"{background} background, {CONFIG['duration']}s at {CONFIG['dimensions']}")
+            builder = make_builder(inputs, background, output_path)
+
+            start = time.time()
+            assert builder.media_utils.execute_ffmpeg_command(
+                builder.build_command(), "build video", show_progress=False
+            )
+            baseline = time.time() - start
+            print(f"  single process: {baseline:.2f}s")
+
+            for workers in CONFIG["workers"]:
+                start = time.time()
+                assert builder.execute_segmented(CONFIG["duration"], workers=workers)
+                elapsed = time.time() - start
+                print(f"  workers={workers}: {elapsed:.2f}s (x{baseline / elapsed:.2f})")
+
+
+if __name__ == "__main__":
+    main()
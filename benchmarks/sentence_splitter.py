@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of TTS.break_text_into_sentences: the precompiled splitter
+against the previous placeholder-replacement implementation, on texts of
+a few thousand words.
+Run from the repository root: python benchmarks/sentence_splitter.py
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.tts import TTS, SENTENCE_ABBREVIATIONS, SENTENCE_BOUNDARY_PATTERNS  # noqa: E402
+
+CONFIG = {
+    "words": [1000, 5000, 20000],
+    "repeats": 20,
+    "texts": {
+        "a": "Dr. Smith met Mr. Jones at the station. They talked about Vol. 3 of the report, etc. Then they left! Was it late? ",
+        "e": "El Sr. García llegó temprano. ¿Dónde está la Dra. López? Hablaron del cap. 4, pág. 12, etc. Luego salieron. ",
+        "z": "你好。我是学生！真的吗？今天天气很好。",
+    },
+}
+
+
+def legacy_break_text_into_sentences(text, lang_code):
+    """The previous implementation: one str.replace per abbreviation, forward and back."""
+    abbrevs = set(SENTENCE_ABBREVIATIONS.get(lang_code, set()))
+    protected_text = text
+    replacements = {}
+    for i, abbrev in enumerate(abbrevs):
+        placeholder = f"__ABBREV_{i}__"
+        protected_text = protected_text.replace(abbrev, placeholder)
+        replacements[placeholder] = abbrev
+    pattern = SENTENCE_BOUNDARY_PATTERNS.get(lang_code, SENTENCE_BOUNDARY_PATTERNS["a"])
+    sentences = re.split(pattern, protected_text.strip())
+    restored_sentences = []
+    for sentence in sentences:
+        for placeholder, original in replacements.items():
+            sentence = sentence.replace(placeholder, original)
+        sentence = sentence.strip()
+        if sentence:
+            restored_sentences.append(sentence)
+    return restored_sentences if restored_sentences else [text.strip()]
+
+
+def main():
+    tts = TTS()
+    for lang_code, sample in CONFIG["texts"].items():
+        sample_words = max(1, len(sample.split()))
+        for words in CONFIG["words"]:
+            text = sample * max(1, words // sample_words)
+            legacy = timeit.timeit(
+                lambda: legacy_break_text_into_sentences(text, lang_code),
+                number=CONFIG["repeats"],
+            ) / CONFIG["repeats"]
+            compiled = timeit.timeit(
+                lambda: tts.break_text_into_sentences(text, lang_code),
+                number=CONFIG["repeats"],
+            ) / CONFIG["repeats"]
+            print(
+                f"lang={lang_code} words~{words}: legacy={legacy * 1000:.2f}ms "
+                f"compiled={compiled * 1000:.2f}ms (x{legacy / compiled:.1f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
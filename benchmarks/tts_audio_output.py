@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory and disk cost of writing TTS output: the previous
+stereo (duplicated channel) WAV against the mono WAV/FLAC/Ogg outputs.
+Uses a synthetic 24kHz signal instead of a model, so it runs anywhere.
+Run from the repository root: python benchmarks/tts_audio_output.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video.audio import write_audio  # noqa: E402
+
+CONFIG = {
+    "sample_rate": 24000,
+    "minutes": [1, 10, 30],
+    "chunk_seconds": 5,  # length of each synthesized chunk
+}
+
+
+def synthesize_chunks(minutes: int) -> list:
+    rate = CONFIG["sample_rate"]
+    chunk = int(rate * CONFIG["chunk_seconds"])
+    t = np.arange(chunk, dtype=np.float32) / rate
+    count = int(minutes * 60 / CONFIG["chunk_seconds"])
+    return [(0.3 * np.sin(2 * np.pi * (180 + i % 40) * t)).astype(np.float32) for i in range(count)]
+
+
+def write_stereo_wav(path: str, chunks: list):
+    audio_data = np.concatenate(chunks)
+    audio_data = np.column_stack((audio_data, audio_data))
+    sf.write(path, audio_data, CONFIG["sample_rate"], format="WAV")
+
+
+def write_mono(path: str, chunks: list):
+    write_audio(path, np.concatenate(chunks), CONFIG["sample_rate"])
+
+
+def measure(name: str, fn, path: str, chunks: list):
+    tracemalloc.start()
+    start = time.time()
+    fn(path, chunks)
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = os.path.getsize(path)
+    print(f"  {name:<12} peak={peak / 1e6:8.1f}MB  file={size / 1e6:8.1f}MB  time={elapsed:.2f}s")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for minutes in CONFIG["minutes"]:
+            chunks = synthesize_chunks(minutes)
+            print(f"{minutes} min of audio")
+            measure("stereo wav", write_stereo_wav, os.path.join(tmp_dir, "stereo.wav"), chunks)
+            measure("mono wav", write_mono, os.path.join(tmp_dir, "mono.wav"), chunks)
+            measure("mono flac", write_mono, os.path.join(tmp_dir, "mono.flac"), chunks)
+            measure("mono ogg", write_mono, os.path.join(tmp_dir, "mono.ogg"), chunks)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,7 +7,12 @@ from loguru import logger
 from api_server.auth_middleware import auth_middleware
 from api_server.v1_utils_router import v1_utils_router
 from api_server.v1_media_router import v1_media_api_router
-from video.config import device
+from video.config import device, kokoro_preload_voices, chatterbox_preload
+from video.models import kokoro_pipelines, chatterbox_models
+from video.jobs import job_queue
+from video.job_store import job_store
+from video.executor import stage_executor
+from video.encoders import detect_encoders
 
 logger.remove()
 logger.add(
@@ -24,8 +29,19 @@ logger.info("Using device: {}", device)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("Starting up the server...")
+    job_store.mark_interrupted()
+    job_store.prune(force=True)
+    await asyncio.to_thread(detect_encoders)
+    if kokoro_preload_voices:
+        await asyncio.to_thread(kokoro_pipelines.preload, kokoro_preload_voices)
+    if chatterbox_preload:
+        await asyncio.to_thread(chatterbox_models.load, warm_up=True)
+    stage_executor.start()
     yield
     logger.info("Shutting down the server...")
+    job_queue.shutdown()
+    stage_executor.shutdown()
+    chatterbox_models.unload()
 
 app = FastAPI(lifespan=lifespan)
 
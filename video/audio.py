@@ -0,0 +1,170 @@
+import os
+import struct
+from typing import Iterable, Iterator
+import numpy as np
+import soundfile as sf
+from video.config import tts_audio_subtype
+
+# container and default sample format by file extension
+AUDIO_FORMATS = {
+    ".wav": ("WAV", tts_audio_subtype),
+    ".flac": ("FLAC", "PCM_16"),
+    ".ogg": ("OGG", "VORBIS"),
+}
+
+# data size used when the length of the stream isn't known upfront
+STREAMING_DATA_SIZE = 0xFFFFFFFF - 36
+
+
+def wav_header(
+    sample_rate: int, channels: int = 1, bits_per_sample: int = 16, num_frames: int = None
+) -> bytes:
+    """
+    Builds a PCM WAV header.
+
+    Args:
+        sample_rate (int): Sample rate in Hz.
+        channels (int): Number of channels.
+        bits_per_sample (int): Bits per sample.
+        num_frames (int): Number of frames, None for a stream of unknown
+            length, in which case the sizes are set to the maximum value and
+            players read until the end of the stream.
+
+    Returns:
+        bytes: The 44-byte header.
+    """
+    block_align = channels * bits_per_sample // 8
+    if num_frames is None:
+        data_size = STREAMING_DATA_SIZE
+    else:
+        data_size = num_frames * block_align
+    return b"".join(
+        [
+            b"RIFF",
+            struct.pack("<I", data_size + 36),
+            b"WAVE",
+            b"fmt ",
+            struct.pack(
+                "<IHHIIHH",
+                16,
+                1,
+                channels,
+                sample_rate,
+                sample_rate * block_align,
+                block_align,
+                bits_per_sample,
+            ),
+            b"data",
+            struct.pack("<I", data_size),
+        ]
+    )
+
+
+def audio_format(output_path: str) -> tuple[str, str]:
+    """
+    Returns the soundfile format and subtype for the output file extension.
+
+    Raises:
+        ValueError: If the extension is not a supported audio format.
+    """
+    file_extension = os.path.splitext(output_path)[1].lower()
+    if file_extension not in AUDIO_FORMATS:
+        raise ValueError(f"Unsupported audio format: {file_extension}")
+    return AUDIO_FORMATS[file_extension]
+
+
+def mono_samples(samples) -> np.ndarray:
+    """
+    Returns mono float32 samples (numpy array or torch tensor) clipped to
+    [-1, 1]. libsndfile doesn't clip when converting float to PCM, peaks
+    above full scale would wrap around into loud clicks.
+    """
+    if hasattr(samples, "detach"):
+        samples = samples.detach().cpu().numpy()
+    return np.clip(np.asarray(samples, dtype=np.float32).reshape(-1), -1.0, 1.0)
+
+
+def write_audio(output_path: str, samples, sample_rate: int):
+    """
+    Writes mono float samples (numpy array or torch tensor) to output_path,
+    in the format given by its extension. Audio is kept mono; consumers that
+    need stereo upmix while encoding.
+    """
+    file_format, subtype = audio_format(output_path)
+    sf.write(
+        output_path,
+        mono_samples(samples),
+        sample_rate,
+        format=file_format,
+        subtype=subtype,
+    )
+
+
+class AudioWriter:
+    """
+    Writes mono audio to a file chunk by chunk, so only the current chunk is
+    held in memory instead of the whole output. The format comes from the
+    file extension, see audio_format.
+
+    Used as a context manager; the partial file is removed if the block
+    raises.
+    """
+
+    def __init__(self, output_path: str, sample_rate: int):
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.frames = 0
+        self._file = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds of the audio written so far."""
+        return self.frames / self.sample_rate
+
+    def __enter__(self):
+        file_format, subtype = audio_format(self.output_path)
+        self._file = sf.SoundFile(
+            self.output_path,
+            mode="w",
+            samplerate=self.sample_rate,
+            channels=1,
+            format=file_format,
+            subtype=subtype,
+        )
+        return self
+
+    def write(self, samples) -> float:
+        """
+        Appends mono float samples (numpy array or torch tensor).
+
+        Returns:
+            float: Duration in seconds of the appended samples.
+        """
+        samples = mono_samples(samples)
+        self._file.write(samples)
+        self.frames += len(samples)
+        return len(samples) / self.sample_rate
+
+    def write_silence(self, seconds: float):
+        self.write(np.zeros(int(self.sample_rate * seconds), dtype=np.float32))
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._file.close()
+        if exc_type is not None and os.path.exists(self.output_path):
+            os.remove(self.output_path)
+        return False
+
+
+def to_pcm16(samples) -> bytes:
+    """Converts float samples in [-1, 1] (numpy array or torch tensor) to little-endian 16-bit PCM."""
+    return (mono_samples(samples) * 32767).astype("<i2").tobytes()
+
+
+def stream_wav(chunks: Iterable, sample_rate: int) -> Iterator[bytes]:
+    """
+    Streams mono float audio chunks as a WAV file: the header first, then
+    the PCM data of every chunk as soon as it is available.
+    """
+    yield wav_header(sample_rate)
+    for chunk in chunks:
+        yield to_pcm16(chunk)
@@ -1,4 +1,16 @@
 from video.media import MediaUtils
+from video.encoders import encoder_args
+from video.ken_burns import KenBurnsFrames
+from video.config import (
+    ken_burns_method,
+    render_gop_size,
+    render_segment_min_duration,
+    render_segment_threads,
+    render_segment_workers,
+)
+import os
+import shutil
+import tempfile
 import time
 from loguru import logger
 
@@ -21,14 +33,39 @@ class VideoBuilder:
         self.captions = None
         self.output_path = "output.mp4"
 
+        # Encoding, see video/encoders.py
+        self.encoder_profile = None
+        self.video_encoder = None
+        self.encoder_threads = None
+        self.encoder_tune = None
+
         # Internal state
         self.media_utils = None
+        self.background_frames = None
 
     def set_media_utils(self, media_utils: MediaUtils):
         """Set the media manager for duration calculations."""
         self.media_utils = media_utils
         return self
 
+    def set_encoder(
+        self,
+        encoder_profile: str = None,
+        video_encoder: str = None,
+        encoder_threads: int = None,
+        encoder_tune: str = None,
+    ):
+        """Set the encoder profile, video encoder, threads and tune, defaults are used for None.
+
+        Segmented renders keep RENDER_SEGMENT_THREADS per worker instead of the
+        requested threads, so the workers stay within the core budget.
+        """
+        self.encoder_profile = encoder_profile
+        self.video_encoder = video_encoder
+        self.encoder_threads = encoder_threads
+        self.encoder_tune = encoder_tune
+        return self
+
     def set_background_image(self, file_path: str, effect_config: dict = None):
         """Set background as an image with optional visual effects.
         
@@ -36,6 +73,8 @@ class VideoBuilder:
             file_path: Path to the image file
             effect_config: Configuration for visual effects. Supported effects:
                 - Ken Burns (zoom): {"effect": "ken_burns", "zoom_factor": 0.001, "direction": "zoom-to-top-left"}
+                  directions are listed in video/ken_burns.py; "method": "zoompan" uses
+                  ffmpeg's zoompan (top-left, top and center only) instead of rendered frames
                 - Pan: {"effect": "pan", "direction": "left-to-right", "speed": "normal"}
         """
         self.background = {
@@ -77,8 +116,19 @@ class VideoBuilder:
         self.output_path = output_path
         return self
 
-    def build_command(self):
-        """Build the complete FFmpeg command."""
+    def build_command(self, segment: tuple = None, background_frames: KenBurnsFrames = None):
+        """Build the complete FFmpeg command.
+
+        Args:
+            segment: Optional (start in seconds, number of frames, output path)
+                to render only that part of the timeline, without audio. The
+                inputs are seeked to the segment start and the time based
+                effects and captions are shifted by it, so each worker only
+                filters its own frames.
+            background_frames: Ken Burns frames shared by the segments of a
+                render, so the image is decoded once; a new KenBurnsFrames is
+                created and set as self.background_frames when None.
+        """
         if not self.background:
             raise ValueError("Background must be set (image or video).")
 
@@ -112,6 +162,14 @@ class VideoBuilder:
             if not audio_duration:
                 raise ValueError("Could not determine audio duration")
 
+        # Segments seek their inputs, time based filters are shifted by segment_start
+        segment_start = 0
+        input_duration = audio_duration
+        if segment is not None:
+            segment_start, segment_frames, segment_path = segment
+            # one extra frame so rounding never leaves the segment short
+            input_duration = (segment_frames + 1) / self.output_frame_rate()
+
         # Build command
         cmd = [self.ffmpeg_path, "-y"]
 
@@ -119,11 +177,9 @@ class VideoBuilder:
         input_index = 0
 
         # Add background input
+        if background_frames is None:
+            self.background_frames = None
         if self.background["type"] == "image":
-            cmd.extend(
-                ["-loop", "1", "-t", str(audio_duration), "-i", self.background["file"]]
-            )
-
             # Get effect configuration with backward compatibility
             effect_config = self.background.get("effect_config", {"effect": "ken_burns"})
             
@@ -141,21 +197,62 @@ class VideoBuilder:
 
             fps = 25
             duration_frames = int(audio_duration * fps)
-            
-            if effect_type == "ken_burns":
-                # Ken Burns (zoom) effect
+            method = effect_config.get("method", ken_burns_method)
+            render_frames = effect_type == "ken_burns" and method == "frames"
+
+            if not render_frames:
+                cmd.extend(
+                    ["-loop", "1", "-t", str(input_duration), "-i", self.background["file"]]
+                )
+
+            if render_frames:
+                # Ken Burns frames rendered from a single decode of the image, piped as rawvideo
+                if background_frames is None:
+                    self.background_frames = KenBurnsFrames(
+                        self.background["file"],
+                        (self.width, self.height),
+                        audio_duration,
+                        fps=fps,
+                        zoom_factor=effect_config.get("zoom_factor", 0.001),
+                        direction=effect_config.get("direction", "zoom-to-top-left"),
+                    )
+                cmd.extend(
+                    [
+                        "-f",
+                        "rawvideo",
+                        "-pix_fmt",
+                        "rgb24",
+                        "-s",
+                        f"{self.width}x{self.height}",
+                        "-framerate",
+                        str(fps),
+                    ]
+                )
+                # segments only receive their own frames, see execute_segmented
+                cmd.extend(["-i", "pipe:0"])
+                filter_parts.append(f"[{input_index}]setsar=1:1[bg]")
+
+            elif effect_type == "ken_burns":
+                # Ken Burns (zoom) effect with zoompan
                 zoom_factor = effect_config.get("zoom_factor", 0.001)
                 direction = effect_config.get("direction", "zoom-to-top-left")
 
+                zoom = f"zoom+{zoom_factor}"
+                zoompan_d = duration_frames + 1
+                if segment is not None:
+                    # zoom+zoom_factor gives 1 + zoom_factor * (n + 1) at output frame n,
+                    # segments continue from their first frame in the timeline
+                    start_frame = round(segment_start * fps)
+                    zoom = f"min(10,1+{zoom_factor}*(on+{start_frame + 1}))"
+                    zoompan_d = segment_frames + 1
+
                 # todo without upscaling we can't use the top and center zooms. upscaling increases the render time
                 zoom_expressions = {
-                    "zoom-to-top": f"z='zoom+{zoom_factor}':x=iw/2-(iw/zoom/2):y=0",
-                    "zoom-to-center": f"z='zoom+{zoom_factor}':x=iw/2-(iw/zoom/2):y=ih/2-(ih/zoom/2)",
-                    "zoom-to-top-left": f"z='zoom+{zoom_factor}':x=0:y=0",
+                    "zoom-to-top": f"z='{zoom}':x=iw/2-(iw/zoom/2):y=0",
+                    "zoom-to-center": f"z='{zoom}':x=iw/2-(iw/zoom/2):y=ih/2-(ih/zoom/2)",
+                    "zoom-to-top-left": f"z='{zoom}':x=0:y=0",
                 }
                 zoom_expr = zoom_expressions.get(direction, zoom_expressions["zoom-to-top-left"])
-
-                zoompan_d = duration_frames + 1
                 filter_parts.append(
                     f"[{input_index}]scale={self.width}:-2,setsar=1:1,"
                     f"crop={self.width}:{self.height},"
@@ -215,8 +312,9 @@ class VideoBuilder:
                 
                 # Create pan expression
                 # Linear interpolation from start to end position over the duration
-                pan_x_expr = f"{start_x}+({end_x}-{start_x})*t/{audio_duration}*{speed_mult}"
-                pan_y_expr = f"{start_y}+({end_y}-{start_y})*t/{audio_duration}*{speed_mult}"
+                pan_time = f"(t+{segment_start})" if segment_start else "t"
+                pan_x_expr = f"{start_x}+({end_x}-{start_x})*{pan_time}/{audio_duration}*{speed_mult}"
+                pan_y_expr = f"{start_y}+({end_y}-{start_y})*{pan_time}/{audio_duration}*{speed_mult}"
                 
                 filter_parts.append(
                     f"[{input_index}]scale={scaled_width}:{scaled_height},setsar=1:1,"
@@ -230,17 +328,26 @@ class VideoBuilder:
                 )
 
         elif self.background["type"] == "video":
+            if segment_start:
+                # the looped background restarts from its beginning after the seek point
+                background_duration = self.media_utils.get_video_info(
+                    self.background["file"]
+                ).get("duration")
+                seek = segment_start % background_duration if audio_duration and background_duration else segment_start
+                cmd.extend(["-ss", str(seek)])
             if audio_duration:
                 cmd.extend(
                     [
                         "-stream_loop",
                         "-1",
                         "-t",
-                        str(audio_duration),
+                        str(input_duration),
                         "-i",
                         self.background["file"],
                     ]
                 )
+            elif segment is not None:
+                cmd.extend(["-t", str(input_duration), "-i", self.background["file"]])
             else:
                 cmd.extend(["-i", self.background["file"]])
             filter_parts.append(f"[{input_index}]scale={self.width}:{self.height}[bg]")
@@ -259,7 +366,14 @@ class VideoBuilder:
         if self.captions:
             subtitle_file = self.captions.get("file")
             if subtitle_file:
-                filter_parts.append(f"{current_video}subtitles={subtitle_file}[v]")
+                if segment_start:
+                    # render the captions at the segment's place in the timeline
+                    filter_parts.append(
+                        f"{current_video}setpts=PTS+{segment_start}/TB,"
+                        f"subtitles={subtitle_file},setpts=PTS-{segment_start}/TB[v]"
+                    )
+                else:
+                    filter_parts.append(f"{current_video}subtitles={subtitle_file}[v]")
                 current_video = "[v]"
         else:
             # Rename final video output
@@ -273,17 +387,30 @@ class VideoBuilder:
 
         # Map video and audio
         cmd.extend(["-map", current_video])
-        if audio_input_index is not None:
+        if audio_input_index is not None and segment is None:
             cmd.extend(["-map", f"{audio_input_index}:a"])
 
         # Video codec settings
-        cmd.extend(["-c:v", "libx264", "-preset", "ultrafast"])
+        cmd.extend(
+            encoder_args(
+                self.encoder_profile,
+                "fast",
+                self.video_encoder,
+                threads=render_segment_threads if segment is not None else self.encoder_threads,
+                tune=self.encoder_tune,
+            )
+        )
 
-        cmd.extend(["-crf", "23", "-pix_fmt", "yuv420p"])
+        if segment is not None:
+            cmd.extend(["-g", str(render_gop_size)])
+            cmd.extend(["-frames:v", str(segment_frames)])
+            cmd.extend(["-an", segment_path])
+            return cmd
 
         # Audio codec settings
         if self.audio_file:
-            cmd.extend(["-c:a", "aac", "-b:a", "192k"])
+            # TTS audio is mono, upmix while encoding
+            cmd.extend(["-c:a", "aac", "-b:a", "192k", "-ac", "2"])
             if audio_duration:
                 cmd.extend(["-t", str(audio_duration)])
 
@@ -319,17 +446,29 @@ class VideoBuilder:
                 video_info = self.media_utils.get_video_info(self.background["file"])
                 expected_duration = video_info.get("duration")
 
-            context_logger.bind(
-                command=" ".join(cmd),
-                expected_duration=expected_duration,
-            ).debug("executing video build command")
-            # Execute using MediaUtils for proper logging and progress tracking
-            success = self.media_utils.execute_ffmpeg_command(
-                cmd,
-                "build video",
-                expected_duration=expected_duration,
-                show_progress=True,
-            )
+            if (
+                render_segment_workers > 1
+                and expected_duration
+                and expected_duration >= render_segment_min_duration
+            ):
+                success = self.execute_segmented(expected_duration)
+            else:
+                context_logger.bind(
+                    command=" ".join(cmd),
+                    expected_duration=expected_duration,
+                ).debug("executing video build command")
+                # Execute using MediaUtils for proper logging and progress tracking
+                success = self.media_utils.execute_ffmpeg_command(
+                    cmd,
+                    "build video",
+                    expected_duration=expected_duration,
+                    show_progress=True,
+                    input_data=(
+                        self.background_frames.frames()
+                        if self.background_frames
+                        else None
+                    ),
+                )
 
             if success:
                 context_logger.bind(execution_time=time.time() - start).info(
@@ -347,6 +486,81 @@ class VideoBuilder:
             return False
 
 
+    def output_frame_rate(self) -> float:
+        """Returns the frame rate of the rendered video."""
+        if self.background["type"] == "video":
+            fps = self.media_utils.frame_rate(
+                self.media_utils.probe(self.background["file"])
+            )
+            if fps:
+                return fps
+        # still images are looped and animated at 25 fps
+        return 25
+
+    def execute_segmented(self, duration: float, workers: int = None) -> bool:
+        """
+        Renders the video as keyframe-aligned segments encoded by parallel
+        ffmpeg processes, then joins them with stream copy and encodes the
+        audio once.
+
+        Args:
+            duration: Duration of the output in seconds
+            workers: Number of parallel ffmpeg processes, defaults to
+                RENDER_SEGMENT_WORKERS
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        workers = workers or render_segment_workers
+        fps = self.output_frame_rate()
+        ranges = self.media_utils.segment_ranges(
+            duration,
+            fps,
+            workers,
+            render_gop_size,
+        )
+        logger.bind(
+            segments=len(ranges),
+            workers=workers,
+            threads=render_segment_threads,
+            duration=duration,
+        ).debug("rendering video in segments")
+
+        # the Ken Burns frames of the whole render, each segment renders its
+        # own range of them from a single decode of the image
+        self.build_command()
+        background_frames = self.background_frames
+
+        work_dir = tempfile.mkdtemp(
+            prefix="render_", dir=os.path.dirname(os.path.abspath(self.output_path))
+        )
+        try:
+            segment_paths = self.media_utils.render_segments(
+                lambda start, frames, path: self.build_command(
+                    (start, frames, path), background_frames
+                ),
+                ranges,
+                work_dir,
+                "build video",
+                workers=workers,
+                segment_input_data=(
+                    (lambda start, frames: background_frames.frames(round(start * fps), frames))
+                    if background_frames
+                    else None
+                ),
+            )
+            if not segment_paths:
+                return False
+            return self.media_utils.concat_segments(
+                segment_paths,
+                self.output_path,
+                audio_path=self.audio_file,
+                duration=duration if self.audio_file else None,
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
 async def build_video(
     input_path: str,
     output_path: str,
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from importlib import metadata
+from typing import Optional, Tuple
+from loguru import logger
+from video.config import (
+    tts_cache_dir,
+    tts_cache_max_bytes,
+    transcript_cache_dir,
+    transcript_cache_max_bytes,
+)
+
+
+def package_version(name: str) -> str:
+    """Returns the installed version of a package, used to key cached model outputs."""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def content_hash(source) -> str:
+    """
+    Returns the SHA-256 of a file's content.
+
+    Args:
+        source: File path or binary file object; file objects are read from
+            the start and rewound, so they can still be consumed afterwards.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    position = source.tell()
+    source.seek(0)
+    while chunk := source.read(1024 * 1024):
+        digest.update(chunk)
+    source.seek(position)
+    return digest.hexdigest()
+
+
+def link_or_copy(src: str, dst: str):
+    """Hardlinks src to dst, falling back to a copy across filesystems."""
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class FileCache:
+    """
+    Content-addressed on-disk cache with size-bounded LRU eviction.
+
+    Every entry is a JSON metadata file, optionally with a data file next to
+    it. Hits refresh the metadata mtime, and the least recently used entries
+    are evicted once the cache grows over max_bytes. Files are written to a
+    temporary name and renamed, so several processes can share the directory.
+    """
+
+    def __init__(self, name: str, cache_dir: str, max_bytes: int):
+        self.name = name
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.cache_dir) and self.max_bytes > 0
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Returns the SHA-256 of the JSON-encoded key parts."""
+        return hashlib.sha256(
+            json.dumps(parts, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _data_path(self, key: str, file_extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{file_extension}")
+
+    def get(self, key: str) -> Optional[Tuple[dict, Optional[str]]]:
+        """
+        Looks up an entry.
+
+        Args:
+            key (str): Cache key, see make_key.
+
+        Returns:
+            Optional[Tuple[dict, Optional[str]]]: The metadata and the path of
+            the data file (None for metadata-only entries), or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        meta_path = self._meta_path(key)
+        try:
+            with open(meta_path, "r") as f:
+                entry = json.load(f)
+            data_path = None
+            if entry.get("file_extension") is not None:
+                data_path = self._data_path(key, entry["file_extension"])
+                if not os.path.exists(data_path):
+                    raise FileNotFoundError(data_path)
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.bind(cache=self.name, key=key).debug("cache hit")
+        return entry["meta"], data_path
+
+    def put(
+        self, key: str, meta: dict, src_path: str = None, file_extension: str = ""
+    ):
+        """
+        Stores an entry, linking or copying src_path as its data file.
+
+        Args:
+            key (str): Cache key, see make_key.
+            meta (dict): JSON-serializable metadata.
+            src_path (str): Optional file to store with the entry.
+            file_extension (str): Extension of the data file, e.g., '.wav'.
+        """
+        if not self.enabled:
+            return
+        tmp_suffix = f".{uuid.uuid4().hex}.tmp"
+        try:
+            entry = {"meta": meta, "file_extension": None, "created_at": time.time()}
+            if src_path:
+                data_path = self._data_path(key, file_extension)
+                link_or_copy(src_path, data_path + tmp_suffix)
+                os.replace(data_path + tmp_suffix, data_path)
+                entry["file_extension"] = file_extension
+            meta_path = self._meta_path(key)
+            with open(meta_path + tmp_suffix, "w") as f:
+                json.dump(entry, f)
+            os.replace(meta_path + tmp_suffix, meta_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.bind(cache=self.name, key=key, error=str(e)).warning(
+                "failed to store cache entry"
+            )
+            return
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in max_bytes."""
+        entries = {}
+        total_size = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for dir_entry in it:
+                    if dir_entry.name.endswith(".tmp"):
+                        continue
+                    key = dir_entry.name.split(".", 1)[0]
+                    stat = dir_entry.stat()
+                    entry = entries.setdefault(key, {"size": 0, "last_used": 0, "paths": []})
+                    entry["size"] += stat.st_size
+                    entry["paths"].append(dir_entry.path)
+                    if dir_entry.name.endswith(".json"):
+                        entry["last_used"] = stat.st_mtime
+                    total_size += stat.st_size
+        except OSError:
+            return
+
+        if total_size <= self.max_bytes:
+            return
+        evicted = 0
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]["last_used"]):
+            if total_size <= self.max_bytes:
+                break
+            for path in entry["paths"]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total_size -= entry["size"]
+            evicted += 1
+        logger.bind(cache=self.name, evicted=evicted, size=total_size).debug(
+            "cache entries evicted"
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+class TTSCache(FileCache):
+    """
+    Cache of synthesized speech keyed by the text, the voice and generation
+    settings, the engine and the engine version. Entries hold the audio file
+    and the captions.
+    """
+
+    def lookup(self, output_path: str, **key_parts) -> Tuple[str, Optional[dict]]:
+        """
+        Looks up the speech for the key parts and, on a hit, links the cached
+        audio to output_path. An entry evicted by another worker between the
+        lookup and the link is a miss.
+
+        Returns:
+            Tuple[str, Optional[dict]]: The cache key and the cached metadata,
+            or None on a miss.
+        """
+        file_extension = os.path.splitext(output_path)[1]
+        key = self.make_key(file_extension, key_parts)
+        cached = self.get(key)
+        if cached is None:
+            return key, None
+        meta, data_path = cached
+        try:
+            link_or_copy(data_path, output_path)
+        except OSError as e:
+            logger.bind(cache=self.name, key=key, error=str(e)).warning(
+                "cached entry disappeared, treating it as a miss"
+            )
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return key, None
+        return key, meta
+
+    def store(self, key: str, output_path: str, meta: dict):
+        self.put(
+            key,
+            meta,
+            src_path=output_path,
+            file_extension=os.path.splitext(output_path)[1],
+        )
+
+
+class TranscriptCache(FileCache):
+    """
+    Cache of Whisper transcripts keyed by the audio content hash and the
+    transcription settings. Entries hold the captions and the duration.
+    """
+
+    def make_transcript_key(
+        self,
+        audio,
+        model: str,
+        compute_type: str,
+        language: str,
+        beam_size: int,
+        mode: str = "serial",
+    ) -> str:
+        return self.make_key(
+            content_hash(audio), model, compute_type, language, beam_size, mode
+        )
+
+    def lookup(self, key: str) -> Optional[Tuple[list, float]]:
+        cached = self.get(key)
+        if cached is None:
+            return None
+        meta, _ = cached
+        return meta["captions"], meta["duration"]
+
+    def store(self, key: str, captions: list, duration: float):
+        self.put(key, {"captions": captions, "duration": duration})
+
+
+tts_cache = TTSCache("tts", tts_cache_dir, tts_cache_max_bytes)
+transcript_cache = TranscriptCache(
+    "transcripts", transcript_cache_dir, transcript_cache_max_bytes
+)
@@ -2,6 +2,27 @@ import os
 import torch
 from loguru import logger
 
+num_cores = os.cpu_count() or 1
+if os.path.exists("/sys/fs/cgroup/cpu.max"):
+    with open("/sys/fs/cgroup/cpu.max", "r") as f:
+        line = f.readline()
+        if len(line.split()) == 2:
+            if line.split()[0] == "max":
+                logger.info(
+                    "File /sys/fs/cgroup/cpu.max has max value, using os.cpu_count()"
+                )
+            else:
+                cpu_max = int(line.split()[0])
+                cpu_period = int(line.split()[1])
+                num_cores = max(1, cpu_max // cpu_period)
+                logger.info("Using {} cores", num_cores)
+        else:
+            logger.warning(
+                "File /sys/fs/cgroup/cpu.max does not have 2 values, using os.cpu_count()"
+            )
+else:
+    logger.info("File /sys/fs/cgroup/cpu.max not found, using os.cpu_count()")
+
 device = "cpu"
 if torch.cuda.is_available():
     device = torch.device("cuda")
@@ -9,27 +30,6 @@ elif torch.backends.mps.is_available():
     device = torch.device("mps")
 else:
     device = torch.device("cpu")
-    num_cores = os.cpu_count()
-    if os.path.exists("/sys/fs/cgroup/cpu.max"):
-        with open("/sys/fs/cgroup/cpu.max", "r") as f:
-            line = f.readline()
-            if len(line.split()) == 2:
-                if line.split()[0] == "max":
-                    logger.info(
-                        "File /sys/fs/cgroup/cpu.max has max value, using os.cpu_count()"
-                    )
-                else:
-                    cpu_max = int(line.split()[0])
-                    cpu_period = int(line.split()[1])
-                    num_cores = cpu_max // cpu_period
-                    logger.info("Using {} cores", num_cores)
-            else:
-                logger.warning(
-                    "File /sys/fs/cgroup/cpu.max does not have 2 values, using os.cpu_count()"
-                )
-    else:
-        logger.info("File /sys/fs/cgroup/cpu.max not found, using os.cpu_count()")
-
     logger.info("number of CPU cores: {}", num_cores)
     num_threads = os.environ.get("NUM_THREADS", num_cores)
     logger.info("number of threads to use with torch: {}", num_threads)
@@ -51,3 +51,84 @@ torch.load = patched_torch_load
 
 whisper_model = os.environ.get("WHISPER_MODEL", "small")
 whisper_compute_type = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+# model sizes that can be selected per request, loaded on first use
+whisper_models = list(dict.fromkeys(
+    [whisper_model]
+    + [
+        model.strip()
+        for model in os.environ.get("WHISPER_MODELS", "tiny,base,small").split(",")
+        if model.strip()
+    ]
+))
+# concurrent transcriptions per model, and the threads each of them uses
+whisper_num_workers = int(os.environ.get("WHISPER_NUM_WORKERS", max(1, min(4, num_cores // 4))))
+whisper_cpu_threads = int(os.environ.get("WHISPER_CPU_THREADS", max(1, num_cores // whisper_num_workers)))
+# chunk length (seconds) of parallel transcription
+whisper_chunk_length = float(os.environ.get("WHISPER_CHUNK_LENGTH", 60))
+
+kokoro_max_pipelines = int(os.environ.get("KOKORO_MAX_PIPELINES", 2))
+# threads synthesizing the sentences of international texts concurrently, 1 disables it
+kokoro_parallel_workers = int(os.environ.get("KOKORO_PARALLEL_WORKERS", 1))
+kokoro_preload_voices = [
+    voice.strip()
+    for voice in os.environ.get("KOKORO_PRELOAD_VOICES", "").split(",")
+    if voice.strip()
+]
+
+chatterbox_preload = os.environ.get("CHATTERBOX_PRELOAD", "false").lower() in ("1", "true", "yes")
+chatterbox_idle_ttl = float(os.environ.get("CHATTERBOX_IDLE_TTL", 0))
+# model replicas, chunks of a long text are generated on all of them concurrently
+chatterbox_replicas = int(os.environ.get("CHATTERBOX_REPLICAS", 1))
+chatterbox_conditioning_cache_size = int(os.environ.get("CHATTERBOX_CONDITIONING_CACHE_SIZE", 16))
+chatterbox_persist_conditioning = os.environ.get("CHATTERBOX_PERSIST_CONDITIONING", "false").lower() in ("1", "true", "yes")
+
+# background jobs: number of concurrent jobs per kind and pending jobs per kind
+job_concurrency = {
+    "tts": int(os.environ.get("JOB_TTS_CONCURRENCY", 1)),
+    "render": int(os.environ.get("JOB_RENDER_CONCURRENCY", max(1, num_cores // 4))),
+    "image": int(os.environ.get("JOB_IMAGE_CONCURRENCY", 2)),
+}
+job_queue_size = int(os.environ.get("JOB_QUEUE_SIZE", 32))
+storage_path = os.getenv("STORAGE_PATH", os.path.join(os.path.abspath(os.getcwd()), "media"))
+jobs_db_path = os.environ.get("JOBS_DB_PATH", os.path.join(storage_path, "jobs.sqlite3"))
+# finished job records older than this (seconds) are deleted, 0 keeps them
+jobs_retention = float(os.environ.get("JOBS_RETENTION", 7 * 24 * 3600))
+# at most this many finished job records are kept, 0 for no limit
+jobs_max_records = int(os.environ.get("JOBS_MAX_RECORDS", 10000))
+
+# where the CPU-bound stages of a job run: "inline" (job thread) or "process" (process pool)
+stage_executor_mode = os.environ.get("STAGE_EXECUTOR", "inline")
+stage_process_workers = int(os.environ.get("STAGE_PROCESS_WORKERS", 2))
+
+# parallel ffmpeg encoders splitting long renders into segments, 1 disables it
+render_segment_workers = int(os.environ.get("RENDER_SEGMENT_WORKERS", max(1, min(4, num_cores // 4))))
+# renders shorter than this (seconds) are encoded by a single ffmpeg process
+render_segment_min_duration = float(os.environ.get("RENDER_SEGMENT_MIN_DURATION", 60))
+# keyframe interval (frames) of segmented renders, segment boundaries are aligned to it
+render_gop_size = int(os.environ.get("RENDER_GOP_SIZE", 250))
+# encoder threads per segment worker, so concurrent render jobs stay within the core budget
+render_segment_threads = int(os.environ.get(
+    "RENDER_SEGMENT_THREADS",
+    max(1, num_cores // max(1, job_concurrency["render"]) // max(1, render_segment_workers)),
+))
+
+# video encoding, see video/encoders.py; an empty profile keeps each operation's default
+encoder_profile = os.environ.get("ENCODER_PROFILE", "")
+video_encoder = os.environ.get("VIDEO_ENCODER", "libx264")
+# encoder threads (0 lets ffmpeg decide) and tune, e.g. "film" or "stillimage"
+encoder_threads = int(os.environ.get("ENCODER_THREADS", 0))
+encoder_tune = os.environ.get("ENCODER_TUNE", "")
+
+# Ken Burns renderer: "frames" (single decode, rendered frames piped to ffmpeg) or "zoompan"
+ken_burns_method = os.environ.get("KEN_BURNS_METHOD", "frames")
+
+# sample format of WAV files written by TTS, e.g. PCM_16 or FLOAT
+tts_audio_subtype = os.environ.get("TTS_AUDIO_SUBTYPE", "PCM_16")
+
+# content-addressed cache of TTS results, 0 disables it
+tts_cache_dir = os.environ.get("TTS_CACHE_DIR", os.path.join(storage_path, "cache", "tts"))
+tts_cache_max_bytes = int(float(os.environ.get("TTS_CACHE_SIZE_MB", 1024)) * 1024 * 1024)
+
+# persistent cache of Whisper transcripts, 0 disables it
+transcript_cache_dir = os.environ.get("TRANSCRIPT_CACHE_DIR", os.path.join(storage_path, "cache", "transcripts"))
+transcript_cache_max_bytes = int(float(os.environ.get("TRANSCRIPT_CACHE_SIZE_MB", 64)) * 1024 * 1024)
@@ -0,0 +1,225 @@
+import subprocess
+import threading
+from typing import List, Optional
+from loguru import logger
+from video.config import (
+    encoder_profile,
+    encoder_threads,
+    encoder_tune,
+    video_encoder,
+)
+
+# video encoders that can be selected, with the codec name reported by ffprobe
+VIDEO_ENCODERS = {
+    "libx264": "h264",
+    "libx265": "hevc",
+    "libsvtav1": "av1",
+    "h264_nvenc": "h264",
+    "h264_qsv": "h264",
+}
+
+# encoders that need a device, ffmpeg lists them even when there is none.
+# h264_vaapi is not supported: it needs hwupload in every filter graph.
+HARDWARE_ENCODERS = {"h264_nvenc", "h264_qsv"}
+
+# input pixel format of each encoder, the output is 4:2:0 8-bit for all of them
+ENCODER_PIX_FMTS = {"h264_qsv": "nv12"}
+
+# speed/quality tiers, from the fastest to the smallest output
+ENCODER_PROFILES = {
+    "draft": {
+        "libx264": ["-preset", "ultrafast", "-crf", "28"],
+        "libx265": ["-preset", "ultrafast", "-crf", "30"],
+        "libsvtav1": ["-preset", "12", "-crf", "40"],
+        "h264_nvenc": ["-preset", "p1", "-rc", "vbr", "-cq", "30", "-b:v", "0"],
+        "h264_qsv": ["-preset", "veryfast", "-global_quality", "30"],
+    },
+    "fast": {
+        "libx264": ["-preset", "ultrafast", "-crf", "23"],
+        "libx265": ["-preset", "superfast", "-crf", "28"],
+        "libsvtav1": ["-preset", "10", "-crf", "35"],
+        "h264_nvenc": ["-preset", "p2", "-rc", "vbr", "-cq", "25", "-b:v", "0"],
+        "h264_qsv": ["-preset", "faster", "-global_quality", "25"],
+    },
+    "balanced": {
+        "libx264": ["-preset", "veryfast", "-crf", "23"],
+        "libx265": ["-preset", "veryfast", "-crf", "26"],
+        "libsvtav1": ["-preset", "8", "-crf", "32"],
+        "h264_nvenc": ["-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+        "h264_qsv": ["-preset", "medium", "-global_quality", "23"],
+    },
+    "quality": {
+        "libx264": ["-preset", "fast", "-crf", "22"],
+        "libx265": ["-preset", "medium", "-crf", "24"],
+        "libsvtav1": ["-preset", "6", "-crf", "30"],
+        "h264_nvenc": ["-preset", "p6", "-rc", "vbr", "-cq", "21", "-b:v", "0"],
+        "h264_qsv": ["-preset", "slower", "-global_quality", "21"],
+    },
+}
+
+# values of -tune per encoder, other encoders ignore the tune
+ENCODER_TUNES = {
+    "libx264": ("film", "animation", "grain", "stillimage", "fastdecode", "zerolatency", "psnr", "ssim"),
+    "libx265": ("animation", "grain", "fastdecode", "zerolatency", "psnr", "ssim"),
+}
+
+_available_encoders = None
+_available_encoders_lock = threading.Lock()
+
+
+def encoder_works(encoder: str, ffmpeg_path: str = "ffmpeg") -> bool:
+    """Checks that an encoder can encode a frame, i.e. that its device is usable."""
+    cmd = [
+        ffmpeg_path,
+        "-hide_banner",
+        "-v",
+        "error",
+        "-f",
+        "lavfi",
+        "-i",
+        "color=size=256x256:rate=25",
+        "-frames:v",
+        "1",
+        "-c:v",
+        encoder,
+        "-pix_fmt",
+        ENCODER_PIX_FMTS.get(encoder, "yuv420p"),
+        "-f",
+        "null",
+        "-",
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True, timeout=30)
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        logger.bind(encoder=encoder, error=str(e)).debug("encoder is not usable")
+        return False
+
+
+def detect_encoders(ffmpeg_path: str = "ffmpeg") -> set:
+    """
+    Returns the video encoders of VIDEO_ENCODERS that the installed ffmpeg
+    supports; hardware encoders are only included if a test frame encodes.
+    ffmpeg is queried once per process.
+    """
+    global _available_encoders
+    with _available_encoders_lock:
+        if _available_encoders is not None:
+            return _available_encoders
+        try:
+            output = subprocess.run(
+                [ffmpeg_path, "-hide_banner", "-encoders"],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            listed = {line.split()[1] for line in output.splitlines() if len(line.split()) > 1}
+            _available_encoders = {
+                name
+                for name in VIDEO_ENCODERS
+                if name in listed
+                and (name not in HARDWARE_ENCODERS or encoder_works(name, ffmpeg_path))
+            }
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.bind(error=str(e)).warning(
+                "failed to list ffmpeg encoders, assuming libx264 only"
+            )
+            _available_encoders = {"libx264"}
+        logger.bind(
+            encoders=sorted(_available_encoders),
+            default_encoder=video_encoder,
+            default_profile=encoder_profile or None,
+        ).info("video encoders detected")
+        return _available_encoders
+
+
+def validate_encoder(
+    profile: Optional[str] = None,
+    encoder: Optional[str] = None,
+    threads: Optional[int] = None,
+    tune: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Checks a requested encoder profile, encoder, thread count and tune. The
+    tune is checked against the encoder the request resolves to.
+
+    Returns:
+        Optional[str]: An error message, or None if all of them are valid.
+    """
+    if profile and profile not in ENCODER_PROFILES:
+        return f"Invalid encoder profile: {profile}. Available: {', '.join(ENCODER_PROFILES)}"
+    if encoder and encoder not in detect_encoders():
+        return f"Encoder not available: {encoder}. Available: {', '.join(sorted(detect_encoders()))}"
+    if threads is not None and threads < 0:
+        return f"Invalid encoder threads: {threads}"
+    if tune:
+        # encoder_args ignores a tune the encoder doesn't take, reject it instead
+        selected = resolve_encoder(encoder)
+        tunes = ENCODER_TUNES.get(selected, ())
+        if not tunes:
+            return f"Encoder {selected} does not support a tune"
+        if tune not in tunes:
+            return f"Invalid encoder tune for {selected}: {tune}. Available: {', '.join(tunes)}"
+    return None
+
+
+def resolve_encoder(encoder: Optional[str] = None) -> str:
+    """Returns the encoder to use, falling back to libx264 if it isn't available."""
+    encoder = encoder or video_encoder
+    if encoder not in detect_encoders():
+        logger.bind(encoder=encoder).warning("video encoder not available, using libx264")
+        return "libx264"
+    return encoder
+
+
+def encoder_args(
+    profile: Optional[str] = None,
+    default_profile: str = "balanced",
+    encoder: Optional[str] = None,
+    threads: Optional[int] = None,
+    tune: Optional[str] = None,
+) -> List[str]:
+    """
+    Builds the ffmpeg video codec arguments for an encoder profile.
+
+    Args:
+        profile (str): Requested profile, see ENCODER_PROFILES.
+        default_profile (str): Profile of the operation, used when neither the
+            request nor ENCODER_PROFILE select one.
+        encoder (str): Requested encoder, defaults to VIDEO_ENCODER.
+        threads (int): Encoder threads, defaults to ENCODER_THREADS.
+        tune (str): Encoder tune, defaults to ENCODER_TUNE.
+
+    Returns:
+        List[str]: Arguments starting with -c:v.
+    """
+    profile = profile or encoder_profile or default_profile
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"Invalid encoder profile: {profile}")
+    encoder = resolve_encoder(encoder)
+
+    args = [
+        "-c:v",
+        encoder,
+        *ENCODER_PROFILES[profile][encoder],
+        "-pix_fmt",
+        ENCODER_PIX_FMTS.get(encoder, "yuv420p"),
+    ]
+    tune = tune or encoder_tune
+    if tune in ENCODER_TUNES.get(encoder, ()):
+        args.extend(["-tune", tune])
+    threads = threads if threads is not None else encoder_threads
+    if threads:
+        args.extend(["-threads", str(threads)])
+    if encoder == "libx265":
+        # lets Apple players recognize HEVC in mp4
+        args.extend(["-tag:v", "hvc1"])
+    return args
+
+
+def encoder_for_codec(codec_name: str) -> Optional[str]:
+    """Returns the encoder producing the ffprobe codec name, e.g. 'h264' -> 'libx264'."""
+    for encoder, codec in VIDEO_ENCODERS.items():
+        if codec == codec_name:
+            return encoder
+    return None
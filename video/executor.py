@@ -0,0 +1,132 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+from loguru import logger
+from video.config import (
+    num_cores,
+    stage_executor_mode,
+    stage_process_workers,
+    kokoro_preload_voices,
+    whisper_model,
+    whisper_models,
+    whisper_num_workers,
+)
+from video.job_store import current_job_id, job_context
+
+_instances = {}
+_instances_lock = threading.Lock()
+# set in stage workers, which split the core budget between them
+_stt_cpu_threads = None
+
+
+def get_stt(model_size: str = None):
+    """
+    Returns the Whisper STT instance of this process for the model size,
+    loading it on first use. Sizes must be listed in WHISPER_MODELS.
+    """
+    model_size = model_size or whisper_model
+    if model_size not in whisper_models:
+        raise ValueError(f"Invalid Whisper model: {model_size}")
+    with _instances_lock:
+        key = f"stt_{model_size}"
+        if key not in _instances:
+            from video.stt import STT
+
+            if _stt_cpu_threads:
+                _instances[key] = STT(model_size, cpu_threads=_stt_cpu_threads)
+            else:
+                _instances[key] = STT(model_size)
+        return _instances[key]
+
+
+def transcribe(audio_path, language=None, beam_size=5, model_size=None):
+    """Picklable entry point for transcribing with the STT instance of the current process."""
+    return get_stt(model_size).transcribe(audio_path, language=language, beam_size=beam_size)
+
+
+def _init_worker(torch_threads: int, preload_voices: list):
+    import torch
+    from video.models import kokoro_pipelines
+
+    global _stt_cpu_threads
+
+    # split the core budget between the workers instead of oversubscribing it
+    torch.set_num_threads(torch_threads)
+    _stt_cpu_threads = max(1, torch_threads // whisper_num_workers)
+    start = time.time()
+    get_stt()
+    if preload_voices:
+        kokoro_pipelines.preload(preload_voices)
+    logger.bind(
+        torch_threads=torch_threads,
+        execution_time=time.time() - start,
+    ).debug("stage worker initialized")
+
+
+def _run_in_worker(job_id: str, fn: Callable, args: tuple, kwargs: dict):
+    with job_context(job_id):
+        return fn(*args, **kwargs)
+
+
+class StageExecutor:
+    """
+    Runs the CPU-bound stages of a job (TTS, STT, subtitles, image resizing).
+
+    In 'process' mode the stages run in a pool of worker processes with the
+    models preloaded by the initializer, so the GIL-bound Python code doesn't
+    compete with request handling and renders scale across cores. In
+    'inline' mode they run on the calling thread.
+    """
+
+    def __init__(self, mode: str = "inline", workers: int = 2):
+        if mode not in ("inline", "process"):
+            raise ValueError(f"Invalid stage executor mode: {mode}")
+        self.mode = mode
+        self.workers = max(1, workers)
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                torch_threads = max(1, num_cores // self.workers)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(torch_threads, kokoro_preload_voices),
+                )
+                logger.bind(
+                    workers=self.workers, torch_threads=torch_threads
+                ).debug("stage process pool started")
+            return self._pool
+
+    def start(self):
+        """Starts the worker processes ahead of the first job."""
+        if self.mode == "process":
+            pool = self._get_pool()
+            for _ in range(self.workers):
+                pool.submit(time.sleep, 0)
+
+    def run(self, fn: Callable, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) and returns its result. fn and its arguments
+        must be picklable in 'process' mode.
+        """
+        if self.mode == "inline":
+            return fn(*args, **kwargs)
+        future = self._get_pool().submit(
+            _run_in_worker, current_job_id(), fn, args, kwargs
+        )
+        return future.result()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+stage_executor = StageExecutor(mode=stage_executor_mode, workers=stage_process_workers)
@@ -0,0 +1,286 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+from loguru import logger
+from video.config import jobs_db_path, jobs_max_records, jobs_retention
+
+# finished jobs are pruned at most this often (seconds)
+PRUNE_INTERVAL = 3600
+
+
+def boot_id() -> str:
+    """Returns an ID of the current boot of the machine, pids are only unique within one."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def process_owner() -> str:
+    """Returns the owner recorded on the jobs of this process: host, boot, pid and start time."""
+    return f"{socket.gethostname()}:{boot_id()}:{os.getpid()}:{int(time.time())}"
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobState:
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class JobStore:
+    """
+    SQLite-backed record of background jobs: state, progress, per-stage
+    durations and error text. Every job records the process that owns it;
+    jobs left queued or processing by a process of this machine that is
+    gone are marked as failed on startup, so they don't look busy forever,
+    while the jobs of other live servers sharing the database are left
+    alone. Finished jobs are pruned by age and count.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        retention: float = jobs_retention,
+        max_records: int = jobs_max_records,
+    ):
+        self.db_path = db_path
+        self.retention = retention
+        self.max_records = max_records
+        self.owner = process_owner()
+        self._last_prune = 0.0
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            db_path, timeout=30, check_same_thread=False
+        )
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    progress REAL NOT NULL DEFAULT 0,
+                    stages TEXT NOT NULL DEFAULT '{}',
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT
+                )
+                """
+            )
+            columns = {
+                row["name"]
+                for row in self._connection.execute("PRAGMA table_info(jobs)")
+            }
+            if "owner" not in columns:
+                self._connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+
+    def _execute(self, query: str, params: tuple = ()):
+        with self._lock, self._connection:
+            return self._connection.execute(query, params)
+
+    def is_stale_owner(self, owner: Optional[str]) -> bool:
+        """
+        Checks whether the process that owns a job is gone. Only processes of
+        this machine can be checked, jobs owned by other hosts are never stale.
+        """
+        if not owner:
+            # recorded before owners were tracked
+            return True
+        parts = owner.rsplit(":", 3)
+        if len(parts) != 4 or not parts[2].isdigit():
+            return True
+        hostname, owner_boot_id, pid, _ = parts
+        if hostname != socket.gethostname():
+            return False
+        if owner_boot_id != boot_id():
+            return True
+        # a recycled pid of this process, e.g. pid 1 of a restarted container
+        if int(pid) == os.getpid():
+            return owner != self.owner
+        return not pid_alive(int(pid))
+
+    def mark_interrupted(self) -> int:
+        """Fails the unfinished jobs whose owning process stopped, see is_stale_owner."""
+        rows = self._execute(
+            "SELECT DISTINCT owner FROM jobs WHERE state IN (?, ?)",
+            (JobState.QUEUED, JobState.PROCESSING),
+        ).fetchall()
+        interrupted = 0
+        for row in rows:
+            owner = row["owner"]
+            if not self.is_stale_owner(owner):
+                continue
+            cursor = self._execute(
+                "UPDATE jobs SET state = ?, error = ?, finished_at = ? "
+                "WHERE state IN (?, ?) AND owner IS ?",
+                (
+                    JobState.FAILED,
+                    "interrupted by a server restart",
+                    time.time(),
+                    JobState.QUEUED,
+                    JobState.PROCESSING,
+                    owner,
+                ),
+            )
+            interrupted += cursor.rowcount
+        if interrupted:
+            logger.bind(jobs=interrupted).warning("marked interrupted jobs as failed")
+        return interrupted
+
+    def prune(self, force: bool = False) -> int:
+        """
+        Deletes finished jobs older than the retention, and the oldest ones
+        beyond max_records. Runs at most every PRUNE_INTERVAL seconds unless
+        forced.
+        """
+        now = time.time()
+        if not force and now - self._last_prune < PRUNE_INTERVAL:
+            return 0
+        self._last_prune = now
+        finished = (JobState.READY, JobState.FAILED)
+        deleted = 0
+        if self.retention > 0:
+            cursor = self._execute(
+                "DELETE FROM jobs WHERE state IN (?, ?) AND finished_at < ?",
+                (*finished, now - self.retention),
+            )
+            deleted += cursor.rowcount
+        if self.max_records > 0:
+            cursor = self._execute(
+                "DELETE FROM jobs WHERE id IN ("
+                "SELECT id FROM jobs WHERE state IN (?, ?) "
+                "ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (*finished, self.max_records),
+            )
+            deleted += cursor.rowcount
+        if deleted:
+            logger.bind(jobs=deleted).debug("pruned finished jobs")
+        return deleted
+
+    def create(self, job_id: str, kind: str):
+        self._execute(
+            "INSERT OR REPLACE INTO jobs (id, kind, state, created_at, owner) VALUES (?, ?, ?, ?, ?)",
+            (job_id, kind, JobState.QUEUED, time.time(), self.owner),
+        )
+
+    def start(self, job_id: str):
+        self._execute(
+            "UPDATE jobs SET state = ?, started_at = ? WHERE id = ?",
+            (JobState.PROCESSING, time.time(), job_id),
+        )
+
+    def complete(self, job_id: str):
+        self._execute(
+            "UPDATE jobs SET state = ?, progress = 100, finished_at = ? WHERE id = ?",
+            (JobState.READY, time.time(), job_id),
+        )
+
+    def fail(self, job_id: str, error: str):
+        self._execute(
+            "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE id = ?",
+            (JobState.FAILED, error, time.time(), job_id),
+        )
+
+    def set_progress(self, job_id: str, progress: float):
+        self._execute(
+            "UPDATE jobs SET progress = ? WHERE id = ?",
+            (round(progress, 2), job_id),
+        )
+
+    def add_stage(self, job_id: str, stage: str, duration: float):
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT stages FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row["stages"])
+            stages[stage] = round(stages.get(stage, 0) + duration, 3)
+            self._connection.execute(
+                "UPDATE jobs SET stages = ? WHERE id = ?",
+                (json.dumps(stages), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["stages"] = json.loads(job["stages"])
+        return job
+
+
+job_store = JobStore(jobs_db_path)
+
+_current_job = threading.local()
+
+
+def current_job_id() -> Optional[str]:
+    """Returns the ID of the job running on this thread, if any."""
+    return getattr(_current_job, "job_id", None)
+
+
+@contextmanager
+def job_context(job_id: Optional[str]):
+    """Makes job_id the current job of this thread for progress and stage reporting."""
+    previous = current_job_id()
+    _current_job.job_id = job_id
+    _current_job.progress = 0.0
+    try:
+        yield
+    finally:
+        _current_job.job_id = previous
+
+
+def report_progress(progress: float):
+    """Records the progress (0-100) of the current job; a no-op outside of jobs."""
+    job_id = current_job_id()
+    if not job_id:
+        return
+    # avoid a write for every ffmpeg status line
+    if abs(progress - getattr(_current_job, "progress", 0.0)) < 1 and progress < 100:
+        return
+    _current_job.progress = progress
+    try:
+        job_store.set_progress(job_id, progress)
+    except sqlite3.Error as e:
+        logger.bind(job_id=job_id, error=str(e)).warning("failed to record job progress")
+
+
+@contextmanager
+def job_stage(stage: str):
+    """Records the duration of a stage (e.g. 'tts', 'encode') of the current job."""
+    start = time.time()
+    try:
+        yield
+    finally:
+        duration = time.time() - start
+        job_id = current_job_id()
+        logger.bind(job_id=job_id, stage=stage, duration=duration).debug("job stage finished")
+        if job_id:
+            try:
+                job_store.add_stage(job_id, stage, duration)
+            except sqlite3.Error as e:
+                logger.bind(job_id=job_id, error=str(e)).warning("failed to record job stage")
@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+from loguru import logger
+from video.config import job_concurrency, job_queue_size
+from video.job_store import JobStore, job_store, job_context
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """
+    Runs background jobs on a fixed pool of worker threads per job kind.
+
+    Each kind (e.g. 'tts', 'render') has its own concurrency limit and a
+    bounded queue of pending jobs; submitting to a full queue raises
+    QueueFullError so the API can apply backpressure. The lifecycle of every
+    job is recorded in the job store.
+    """
+
+    def __init__(
+        self,
+        concurrency: Dict[str, int],
+        store: JobStore,
+        max_queue_size: int = 32,
+    ):
+        self.concurrency = {kind: max(1, limit) for kind, limit in concurrency.items()}
+        self.store = store
+        self.max_queue_size = max_queue_size
+        self._pending = {kind: deque() for kind in self.concurrency}
+        self._running = {kind: set() for kind in self.concurrency}
+        self._condition = threading.Condition()
+        self._workers = []
+        self._stopping = False
+
+    def _ensure_workers(self):
+        if self._workers:
+            return
+        for kind, limit in self.concurrency.items():
+            for i in range(limit):
+                worker = threading.Thread(
+                    target=self._work,
+                    args=(kind,),
+                    name=f"job-{kind}-{i}",
+                    daemon=True,
+                )
+                worker.start()
+                self._workers.append(worker)
+        logger.bind(concurrency=self.concurrency).debug("job workers started")
+
+    def submit(self, kind: str, job_id: str, fn: Callable, *args, **kwargs):
+        """
+        Queues fn(*args, **kwargs) to run on a worker of the given kind.
+
+        Raises:
+            ValueError: If the job kind is unknown
+            QueueFullError: If the queue for the job kind is full
+        """
+        if kind not in self.concurrency:
+            raise ValueError(f"Invalid job kind: {kind}")
+
+        with self._condition:
+            if len(self._pending[kind]) >= self.max_queue_size:
+                raise QueueFullError(
+                    f"Too many pending '{kind}' jobs, please try again later."
+                )
+            self._ensure_workers()
+            self.store.create(job_id, kind)
+            self._pending[kind].append((job_id, fn, args, kwargs, time.time()))
+            self._condition.notify_all()
+
+        logger.bind(
+            job_id=job_id,
+            kind=kind,
+            queue_position=len(self._pending[kind]),
+        ).debug("job queued")
+
+    def is_full(self, kind: str) -> bool:
+        with self._condition:
+            return len(self._pending[kind]) >= self.max_queue_size
+
+    def queue_position(self, job_id: str) -> Optional[int]:
+        """
+        Returns the 1-based position of a pending job in its queue,
+        0 if the job is running, or None if the job is not known.
+        """
+        with self._condition:
+            for kind in self.concurrency:
+                if job_id in self._running[kind]:
+                    return 0
+                for position, job in enumerate(self._pending[kind], start=1):
+                    if job[0] == job_id:
+                        return position
+        return None
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                kind: {
+                    "concurrency": self.concurrency[kind],
+                    "running": len(self._running[kind]),
+                    "queued": len(self._pending[kind]),
+                }
+                for kind in self.concurrency
+            }
+
+    def shutdown(self):
+        """Stops the workers once their current job is done; pending jobs are failed."""
+        with self._condition:
+            self._stopping = True
+            dropped = sum(len(pending) for pending in self._pending.values())
+            for pending in self._pending.values():
+                for job in pending:
+                    self.store.fail(job[0], "server shut down before the job started")
+                pending.clear()
+            self._condition.notify_all()
+        if dropped:
+            logger.bind(dropped_jobs=dropped).warning("job queue shut down with pending jobs")
+
+    def _work(self, kind: str):
+        while True:
+            with self._condition:
+                while not self._pending[kind] and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                job_id, fn, args, kwargs, queued_at = self._pending[kind].popleft()
+                self._running[kind].add(job_id)
+
+            start = time.time()
+            context_logger = logger.bind(
+                job_id=job_id,
+                kind=kind,
+                wait_time=start - queued_at,
+            )
+            context_logger.debug("job started")
+            self.store.start(job_id)
+            try:
+                with job_context(job_id):
+                    fn(*args, **kwargs)
+                self.store.complete(job_id)
+                context_logger.bind(execution_time=time.time() - start).debug(
+                    "job completed"
+                )
+            except Exception as e:
+                self.store.fail(job_id, str(e) or type(e).__name__)
+                context_logger.bind(error=str(e)).exception("job failed")
+            finally:
+                with self._condition:
+                    self._running[kind].discard(job_id)
+            try:
+                self.store.prune()
+            except sqlite3.Error as e:
+                logger.bind(error=str(e)).warning("failed to prune finished jobs")
+
+
+job_queue = JobQueue(job_concurrency, job_store, max_queue_size=job_queue_size)
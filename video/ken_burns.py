@@ -0,0 +1,115 @@
+import math
+import threading
+import time
+from typing import Iterator
+from PIL import Image
+from loguru import logger
+
+# point of the image the zoom moves towards, as fractions of its width and height
+KEN_BURNS_DIRECTIONS = {
+    "zoom-to-top-left": (0.0, 0.0),
+    "zoom-to-top": (0.5, 0.0),
+    "zoom-to-top-right": (1.0, 0.0),
+    "zoom-to-left": (0.0, 0.5),
+    "zoom-to-center": (0.5, 0.5),
+    "zoom-to-right": (1.0, 0.5),
+    "zoom-to-bottom-left": (0.0, 1.0),
+    "zoom-to-bottom": (0.5, 1.0),
+    "zoom-to-bottom-right": (1.0, 1.0),
+}
+
+# same limit as ffmpeg's zoompan
+MAX_ZOOM = 10
+
+
+class KenBurnsFrames:
+    """
+    Renders the frames of a Ken Burns zoom over a still image, to be piped
+    to ffmpeg as rawvideo.
+
+    The image is decoded and pre-scaled once; every frame is then a resize
+    of a sub-pixel crop box of it, so the motion is smooth in all directions
+    without running zoompan on a looped, re-decoded input. The zoom follows
+    zoompan's z='zoom+zoom_factor', i.e. 1 + zoom_factor * (n + 1) at frame n.
+    """
+
+    def __init__(
+        self,
+        image_path: str,
+        dimensions: tuple[int, int],
+        duration: float,
+        fps: int = 25,
+        zoom_factor: float = 0.001,
+        direction: str = "zoom-to-top-left",
+    ):
+        self.image_path = image_path
+        self.width, self.height = dimensions
+        self.fps = fps
+        self.frame_count = math.ceil(duration * fps)
+        self.zoom_factor = zoom_factor
+        self.anchor = KEN_BURNS_DIRECTIONS.get(
+            direction, KEN_BURNS_DIRECTIONS["zoom-to-top-left"]
+        )
+        self._image = None
+        self._base_box = None
+        self._lock = threading.Lock()
+
+    def zoom(self, frame: int) -> float:
+        return min(MAX_ZOOM, 1 + self.zoom_factor * (frame + 1))
+
+    def _load(self):
+        with self._lock:
+            if self._image is not None:
+                return
+            start = time.time()
+            image = Image.open(self.image_path).convert("RGB")
+
+            # the sharpest frame needs (output size * final zoom) source pixels,
+            # larger images are scaled down once instead of on every frame
+            max_zoom = max(self.zoom(0), self.zoom(self.frame_count - 1))
+            cover = max(self.width / image.width, self.height / image.height)
+            scale = min(1.0, cover * max_zoom)
+            if scale < 1.0:
+                image = image.resize(
+                    (round(image.width * scale), round(image.height * scale)),
+                    Image.Resampling.LANCZOS,
+                )
+
+            # centered box with the output aspect ratio, the frame at zoom 1
+            box_width = min(image.width, image.height * self.width / self.height)
+            box_height = box_width * self.height / self.width
+            self._base_box = (
+                (image.width - box_width) / 2,
+                (image.height - box_height) / 2,
+                box_width,
+                box_height,
+            )
+            self._image = image
+            logger.bind(
+                image_path=self.image_path,
+                size=image.size,
+                frames=self.frame_count,
+                execution_time=time.time() - start,
+            ).debug("ken burns image prepared")
+
+    def render_frame(self, frame: int) -> bytes:
+        """Returns frame n as packed RGB24."""
+        self._load()
+        base_x, base_y, base_width, base_height = self._base_box
+        zoom = self.zoom(frame)
+        box_width = base_width / zoom
+        box_height = base_height / zoom
+        anchor_x, anchor_y = self.anchor
+        left = base_x + (base_width - box_width) * anchor_x
+        top = base_y + (base_height - box_height) * anchor_y
+        return self._image.resize(
+            (self.width, self.height),
+            Image.Resampling.BILINEAR,
+            box=(left, top, left + box_width, top + box_height),
+        ).tobytes()
+
+    def frames(self, start_frame: int = 0, count: int = None) -> Iterator[bytes]:
+        """Yields count frames starting at start_frame, by default all of them."""
+        end_frame = self.frame_count if count is None else min(self.frame_count, start_frame + count)
+        for frame in range(start_frame, end_frame):
+            yield self.render_frame(frame)
@@ -1,7 +1,30 @@
+import io
+import math
+import os
+import shutil
 import subprocess
 import json
+import tempfile
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fractions import Fraction
+from typing import Iterable
 from loguru import logger
+from video.config import render_segment_workers, render_segment_threads
+from video.encoders import (
+    VIDEO_ENCODERS,
+    detect_encoders,
+    encoder_args,
+    encoder_for_codec,
+)
+from video.job_store import report_progress
+
+# memoized ffprobe results keyed by (path, mtime, size), see MediaUtils.probe
+PROBE_CACHE_SIZE = 1024
+_probe_cache = OrderedDict()
+_probe_cache_lock = threading.Lock()
 
 
 class MediaUtils:
@@ -20,6 +43,10 @@ class MediaUtils:
         output_path: str,
         background_music_path: str = None,
         background_music_volume: float = 0.5,
+        encoder_profile: str = None,
+        video_encoder: str = None,
+        encoder_threads: int = None,
+        encoder_tune: str = None,
     ) -> bool:
         """
         Merges multiple video files into one, optionally with background music.
@@ -29,6 +56,11 @@ class MediaUtils:
             output_path: Path for the merged output video
             background_music: Optional path to background music file
             bg_music_volume: Volume level for background music (0.0 to 1.0, default 0.5)
+            encoder_profile: Optional encoder profile, see video/encoders.py
+            video_encoder: Optional video encoder; clips are only joined with
+                stream copy if they are already encoded with it
+            encoder_threads: Optional encoder threads of the re-encode
+            encoder_tune: Optional encoder tune of the re-encode
 
         Returns:
             bool: True if successful, False otherwise
@@ -46,8 +78,16 @@ class MediaUtils:
         )
 
         try:
+            # Probe every input once, the results are reused below
+            video_infos = [self.get_video_info(path) for path in video_paths]
+            videos_with_audio = [self.has_audio(path) for path in video_paths]
+            for i, has_audio in enumerate(videos_with_audio):
+                context_logger.bind(video_index=i, has_audio=has_audio).debug(
+                    "checked audio stream"
+                )
+
             # Get dimensions from the first video
-            first_video_info = self.get_video_info(video_paths[0])
+            first_video_info = video_infos[0]
             if not first_video_info:
                 context_logger.error("failed to get video info from first video")
                 return False
@@ -60,6 +100,28 @@ class MediaUtils:
                 target_width=target_width, target_height=target_height
             ).debug("using dimensions from first video")
 
+            # Inputs sharing the first video's codec, resolution, fps and audio
+            # layout are joined with stream copy, only the others are re-encoded
+            reference_spec = self.stream_spec(video_paths[0])
+            if self.is_stream_copy_reference(reference_spec) and (
+                not video_encoder
+                or VIDEO_ENCODERS.get(video_encoder) == reference_spec["video_codec"]
+            ):
+                if self.merge_videos_stream_copy(
+                    video_paths,
+                    output_path,
+                    background_music_path=background_music_path,
+                    background_music_volume=background_music_volume,
+                    encoder_profile=encoder_profile,
+                ):
+                    context_logger.bind(execution_time=time.time() - start).debug(
+                        "videos merged successfully",
+                    )
+                    return True
+                context_logger.warning(
+                    "stream copy merge failed, falling back to re-encoding"
+                )
+
             # Base command
             cmd = [self.ffmpeg_path, "-y"]
 
@@ -76,10 +138,8 @@ class MediaUtils:
             # Create filter complex for concatenating videos with re-encoding
             if len(video_paths) == 1:
                 # Single video - re-encode to ensure consistency
-                # Check if the video has audio
-                audio_info = self.get_audio_info(video_paths[0])
-                has_audio = bool(audio_info.get('duration', 0) > 0)
-                
+                has_audio = videos_with_audio[0]
+
                 if background_music_path:
                     if has_audio:
                         cmd.extend(
@@ -118,8 +178,7 @@ class MediaUtils:
                         )
                     else:
                         # No audio in video and no background music, create silent audio
-                        video_info = self.get_video_info(video_paths[0])
-                        video_duration = video_info.get('duration', 10)  # fallback to 10 seconds
+                        video_duration = first_video_info.get('duration', 10)  # fallback to 10 seconds
                         cmd.extend(
                             [
                                 "-filter_complex",
@@ -132,16 +191,6 @@ class MediaUtils:
                         )
             else:
                 # Multiple videos - normalize and concatenate with re-encoding
-                # First, check which videos have audio streams
-                videos_with_audio = []
-                for i, video_path in enumerate(video_paths):
-                    video_info = self.get_video_info(video_path)
-                    # Check if video has audio by trying to get audio info
-                    audio_info = self.get_audio_info(video_path)
-                    has_audio = bool(audio_info.get('duration', 0) > 0)
-                    videos_with_audio.append(has_audio)
-                    context_logger.bind(video_index=i, has_audio=has_audio).debug("checked audio stream")
-
                 # Create normalized video streams for each input
                 normalize_filters = []
                 for i in range(len(video_paths)):
@@ -154,8 +203,7 @@ class MediaUtils:
                 for i in range(len(video_paths)):
                     if not videos_with_audio[i]:
                         # Get video duration for silent audio generation
-                        video_info = self.get_video_info(video_paths[i])
-                        video_duration = video_info.get('duration', 10)  # fallback to 10 seconds
+                        video_duration = video_infos[i].get('duration', 10)  # fallback to 10 seconds
                         audio_filters.append(f"anullsrc=channel_layout=stereo:sample_rate=48000:duration={video_duration}[a{i}n]")
                     else:
                         audio_filters.append(f"[{i}:a]aformat=sample_rates=48000:channel_layouts=stereo[a{i}n]")
@@ -198,30 +246,19 @@ class MediaUtils:
                     )
 
             # Video codec settings
-            cmd.extend(
-                [
-                    "-c:v",
-                    "libx264",
-                    "-preset",
-                    "veryfast",
-                    "-crf",
-                    "23",
-                ]
-            )
+            cmd.extend(encoder_args(encoder_profile, "balanced", video_encoder, encoder_threads, encoder_tune))
 
             # Audio codec settings
             cmd.extend(["-c:a", "aac", "-b:a", "192k"])
 
-            # Other settings
-            cmd.extend(["-pix_fmt", "yuv420p", output_path])
+            cmd.append(output_path)
 
             # Execute the command using the new method
 
             # calculate expected duration for progress tracking
-            expected_duration = 0
-            for video_path in video_paths:
-                video_info = self.get_video_info(video_path)
-                expected_duration += video_info.get("duration", 0)
+            expected_duration = sum(
+                video_info.get("duration", 0) for video_info in video_infos
+            )
 
             success = self.execute_ffmpeg_command(
                 cmd,
@@ -245,47 +282,554 @@ class MediaUtils:
             )
             return False
 
-    def get_video_info(self, file_path: str) -> dict:
+    def merge_videos_stream_copy(
+        self,
+        video_paths: list,
+        output_path: str,
+        background_music_path: str = None,
+        background_music_volume: float = 0.5,
+        encoder_profile: str = None,
+    ) -> bool:
         """
-        Retrieves video information such as duration, width, height, codec, fps, etc.
+        Merges videos with the concat demuxer and stream copy. The first video
+        is the reference: inputs that don't match its stream_spec are
+        re-encoded to it first, so only the mismatched clips pay for encoding.
+        The re-encoded clips must then match the reference exactly, parameter
+        sets included; if the encoder settings of the reference can't be
+        reproduced, False is returned and the caller re-encodes everything.
+        Background music is mixed into the concatenated audio while the video
+        is copied.
 
         Args:
-            file_path: Path to the video file
+            video_paths: List of paths to video files to merge
+            output_path: Path for the merged output video
+            background_music_path: Optional path to background music file
+            background_music_volume: Volume level for background music
+            encoder_profile: Optional encoder profile of the re-encoded clips
 
         Returns:
-            Dictionary containing video information
+            bool: True if successful, False otherwise
         """
+        reference_spec = self.stream_spec(video_paths[0])
+        if not self.is_stream_copy_reference(reference_spec):
+            return False
+
+        context_logger = logger.bind(
+            number_of_videos=len(video_paths), output_path=output_path
+        )
+        work_dir = tempfile.mkdtemp(
+            prefix="merge_", dir=os.path.dirname(os.path.abspath(output_path))
+        )
         try:
+            concat_paths = list(video_paths)
+            mismatched = {}
+            for i, video_path in enumerate(video_paths):
+                if self.stream_spec(video_path) != reference_spec:
+                    mismatched[i] = os.path.join(work_dir, f"clip_{i}.mp4")
+                    context_logger.bind(video_index=i).debug(
+                        "clip does not match the reference, re-encoding"
+                    )
+
+            # mismatched clips are independent, re-encode them concurrently
+            if mismatched:
+                workers = min(render_segment_workers, len(mismatched))
+                threads = render_segment_threads if workers > 1 else None
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = {
+                        executor.submit(
+                            self.normalize_clip,
+                            video_paths[i],
+                            normalized_path,
+                            reference_spec,
+                            threads,
+                            encoder_profile,
+                        ): i
+                        for i, normalized_path in mismatched.items()
+                    }
+                    if not all(future.result() for future in futures):
+                        return False
+                for i, normalized_path in mismatched.items():
+                    if self.stream_spec(normalized_path) != reference_spec:
+                        context_logger.bind(video_index=i).debug(
+                            "re-encoded clip does not match the reference parameter sets"
+                        )
+                        return False
+                    concat_paths[i] = normalized_path
+
+            context_logger.bind(
+                reencoded=sum(
+                    1 for path, original in zip(concat_paths, video_paths)
+                    if path != original
+                )
+            ).debug("joining clips with stream copy")
+
+            concat_list_path = os.path.join(work_dir, "concat.txt")
+            with open(concat_list_path, "w") as f:
+                for path in concat_paths:
+                    escaped_path = os.path.abspath(path).replace("'", "'\\''")
+                    f.write(f"file '{escaped_path}'\n")
+
             cmd = [
-                "ffprobe",
-                "-v",
-                "quiet",
-                "-print_format",
-                "json",
-                "-show_format",
-                "-show_streams",
-                "-select_streams",
-                "v:0",  # Select first video stream
-                file_path,
+                self.ffmpeg_path,
+                "-y",
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                concat_list_path,
             ]
+            if background_music_path:
+                cmd.extend(["-stream_loop", "-1", "-i", background_music_path])
+                cmd.extend(
+                    [
+                        "-filter_complex",
+                        f"[1:a]volume={background_music_volume}[bg];[0:a][bg]amix=inputs=2:duration=first[a]",
+                        "-map",
+                        "0:v",
+                        "-map",
+                        "[a]",
+                        "-c:v",
+                        "copy",
+                        "-c:a",
+                        "aac",
+                        "-b:a",
+                        "192k",
+                    ]
+                )
+            else:
+                cmd.extend(["-map", "0:v", "-map", "0:a", "-c", "copy"])
+            cmd.append(output_path)
 
-            success, stdout, stderr = self.execute_ffprobe_command(
-                cmd, "get video info"
+            expected_duration = sum(
+                self.get_video_info(path).get("duration", 0) for path in concat_paths
             )
+            return self.execute_ffmpeg_command(
+                cmd,
+                "merge videos (stream copy)",
+                expected_duration=expected_duration,
+                show_progress=True,
+            )
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
 
-            if not success:
-                raise Exception(f"ffprobe failed: {stderr}")
+    def stream_spec(self, file_path: str) -> dict:
+        """
+        Returns the stream parameters that must be identical for two files to
+        be concatenated with stream copy, or None if the file has no video
+        stream. Files without an audio stream get a spec without audio
+        parameters, so they never match a reference.
 
-            probe_data = json.loads(stdout)
+        Args:
+            file_path: Path to the video file
 
-            # Extract format information
-            format_info = probe_data.get("format", {})
-            streams = probe_data.get("streams", [])
+        Returns:
+            dict: Codec, profile, level, reference frames, B-frame delay,
+            extradata hash (the codec parameter sets), dimensions, pixel
+            format, frame rate and time base of the video stream, and codec,
+            sample rate and channels of the audio stream
+        """
+        try:
+            probe_data = self.probe(file_path)
+        except Exception as e:
+            logger.bind(file_path=file_path, error=str(e)).error("error probing media")
+            return None
+
+        video_stream = self.first_stream(probe_data, "video")
+        audio_stream = self.first_stream(probe_data, "audio")
+        if video_stream is None:
+            return None
+
+        spec = {
+            "video_codec": video_stream.get("codec_name"),
+            "profile": video_stream.get("profile"),
+            "level": video_stream.get("level"),
+            "refs": video_stream.get("refs"),
+            "has_b_frames": video_stream.get("has_b_frames"),
+            "extradata_hash": video_stream.get("extradata_hash"),
+            "width": video_stream.get("width"),
+            "height": video_stream.get("height"),
+            "pix_fmt": video_stream.get("pix_fmt"),
+            "frame_rate": video_stream.get("r_frame_rate"),
+            "time_base": video_stream.get("time_base"),
+            "audio_codec": None,
+            "sample_rate": None,
+            "channels": None,
+        }
+        if audio_stream is not None:
+            spec.update(
+                {
+                    "audio_codec": audio_stream.get("codec_name"),
+                    "sample_rate": audio_stream.get("sample_rate"),
+                    "channels": audio_stream.get("channels"),
+                }
+            )
 
-            if not streams:
-                raise Exception("No video stream found in file")
+        return spec
+
+    @staticmethod
+    def is_stream_copy_reference(spec: dict) -> bool:
+        """
+        Checks whether clips can be normalized to a stream_spec: it must be
+        yuv420p video from one of the available encoders with AAC audio, the
+        format this server renders.
+        """
+        return (
+            spec is not None
+            and encoder_for_codec(spec["video_codec"]) in detect_encoders()
+            and spec["pix_fmt"] == "yuv420p"
+            and spec["audio_codec"] == "aac"
+        )
+
+    def normalize_clip(
+        self,
+        input_path: str,
+        output_path: str,
+        spec: dict,
+        threads: int = None,
+        encoder_profile: str = None,
+    ) -> bool:
+        """
+        Re-encodes a clip to the given stream_spec so it can be concatenated
+        with stream copy. The video is scaled and padded to the spec's
+        dimensions, and a silent track is added if the clip has no audio.
+
+        Args:
+            input_path: Path to the input video
+            output_path: Path for the normalized video
+            spec: Target stream_spec
+            threads: Optional number of encoder threads
+            encoder_profile: Optional encoder profile, see video/encoders.py
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        width, height = spec["width"], spec["height"]
+        channel_layout = "mono" if spec["channels"] == 1 else "stereo"
+        # merged clips are usually VideoBuilder renders, normalize with its
+        # settings so the parameter sets (e.g. CABAC) can match the reference
+        video_args = encoder_args(
+            encoder_profile,
+            "fast",
+            encoder_for_codec(spec["video_codec"]),
+            threads=threads,
+        )
+        if spec["video_codec"] == "h264":
+            # libx264 profile names, e.g. "Constrained Baseline" -> "baseline"
+            profile = (spec["profile"] or "high").lower().replace("constrained ", "")
+            video_args.extend(["-profile:v", profile])
+            # level and reference frames are part of the SPS, which must match for stream copy
+            if spec.get("level") and spec["level"] > 0:
+                video_args.extend(["-level:v", str(spec["level"])])
+            if spec.get("refs"):
+                video_args.extend(["-refs", str(spec["refs"])])
+            if not spec.get("has_b_frames"):
+                video_args.extend(["-bf", "0"])
+        video_info = self.get_video_info(input_path)
+
+        cmd = [self.ffmpeg_path, "-y", "-i", input_path]
+        if self.has_audio(input_path):
+            audio_map = "0:a:0"
+        else:
+            cmd.extend(
+                [
+                    "-f",
+                    "lavfi",
+                    "-i",
+                    f"anullsrc=channel_layout={channel_layout}:sample_rate={spec['sample_rate']}",
+                ]
+            )
+            audio_map = "1:a"
+
+        cmd.extend(
+            [
+                "-filter_complex",
+                f"[0:v]scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,fps={spec['frame_rate']},format=yuv420p,setsar=1[v]",
+                "-map",
+                "[v]",
+                "-map",
+                audio_map,
+                *video_args,
+                "-c:a",
+                "aac",
+                "-b:a",
+                "192k",
+                "-ar",
+                str(spec["sample_rate"]),
+                "-ac",
+                str(spec["channels"]),
+            ]
+        )
+        # keep the reference's timescale, the concat demuxer copies timestamps as is
+        time_base = spec.get("time_base") or ""
+        if time_base.startswith("1/"):
+            cmd.extend(["-video_track_timescale", time_base[2:]])
+        if video_info.get("duration"):
+            cmd.extend(["-t", str(video_info["duration"])])
+        cmd.append(output_path)
+
+        return self.execute_ffmpeg_command(
+            cmd,
+            "normalize clip",
+            expected_duration=video_info.get("duration"),
+            show_progress=False,
+        )
+
+    @staticmethod
+    def segment_ranges(
+        duration: float, fps: float, segments: int, gop_size: int
+    ) -> list:
+        """
+        Splits a timeline into at most `segments` ranges whose boundaries are
+        multiples of the keyframe interval, so every segment starts on a
+        keyframe of the single-process encode.
+
+        Args:
+            duration: Duration of the output in seconds
+            fps: Frame rate of the output
+            segments: Maximum number of segments
+            gop_size: Keyframe interval in frames
+
+        Returns:
+            list: (start in seconds, number of frames) for each segment
+        """
+        total_frames = math.ceil(duration * fps)
+        frames_per_segment = max(
+            gop_size, math.ceil(total_frames / segments / gop_size) * gop_size
+        )
+        return [
+            (start_frame / fps, min(frames_per_segment, total_frames - start_frame))
+            for start_frame in range(0, total_frames, frames_per_segment)
+        ]
+
+    @staticmethod
+    def frame_rate(probe_data: dict) -> float:
+        """Returns the frame rate of the first video stream of probe data, or None."""
+        video_stream = MediaUtils.first_stream(probe_data, "video")
+        if video_stream is None:
+            return None
+        try:
+            rate = Fraction(video_stream.get("r_frame_rate", "0/1"))
+        except (ValueError, ZeroDivisionError):
+            return None
+        return float(rate) if rate > 0 else None
+
+    def render_segments(
+        self,
+        build_segment_cmd,
+        ranges: list,
+        work_dir: str,
+        operation_name: str,
+        workers: int = None,
+        segment_input_data=None,
+    ) -> list:
+        """
+        Encodes the segments of a timeline in parallel ffmpeg processes.
+
+        Args:
+            build_segment_cmd: Callable (start, frames, output_path) returning
+                the ffmpeg command rendering one video-only segment
+            ranges: Segments as returned by segment_ranges
+            work_dir: Directory for the segment files
+            operation_name: Name of the operation for logging
+            workers: Number of concurrent ffmpeg processes
+            segment_input_data: Optional callable (start, frames) returning
+                the stdin data of a segment, see execute_ffmpeg_command
+
+        Returns:
+            list: Paths of the segments in timeline order, or None on failure
+        """
+        workers = max(1, min(workers or render_segment_workers, len(ranges)))
+        segment_paths = [
+            os.path.join(work_dir, f"segment_{i:04d}.mp4") for i in range(len(ranges))
+        ]
+        context_logger = logger.bind(
+            operation=operation_name, segments=len(ranges), workers=workers
+        )
+        context_logger.debug("rendering segments in parallel")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    self.execute_ffmpeg_command,
+                    build_segment_cmd(start, frames, segment_path),
+                    f"{operation_name} segment {i}",
+                    None,
+                    False,
+                    segment_input_data(start, frames) if segment_input_data else None,
+                )
+                for i, ((start, frames), segment_path) in enumerate(
+                    zip(ranges, segment_paths)
+                )
+            ]
+            # progress is reported from this thread, which carries the job context
+            completed = 0
+            for future in as_completed(futures):
+                if not future.result():
+                    for pending in futures:
+                        pending.cancel()
+                    context_logger.error("segment render failed")
+                    return None
+                completed += 1
+                report_progress(completed / len(futures) * 100)
+
+        return segment_paths
+
+    def concat_segments(
+        self,
+        segment_paths: list,
+        output_path: str,
+        audio_path: str = None,
+        duration: float = None,
+    ) -> bool:
+        """
+        Joins video segments with stream copy, encoding the audio track once
+        over the whole timeline so there are no gaps at the segment seams.
 
-            video_stream = streams[0]
+        Args:
+            segment_paths: Video-only segments in timeline order
+            output_path: Path for the output video
+            audio_path: Optional audio file to add, upmixed to stereo
+            duration: Optional duration to cut the output to
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        concat_list_path = os.path.join(
+            os.path.dirname(segment_paths[0]), "segments.txt"
+        )
+        with open(concat_list_path, "w") as f:
+            for path in segment_paths:
+                escaped_path = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped_path}'\n")
+
+        cmd = [
+            self.ffmpeg_path,
+            "-y",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            concat_list_path,
+        ]
+        if audio_path:
+            cmd.extend(["-i", audio_path, "-map", "0:v", "-map", "1:a"])
+            cmd.extend(["-c:v", "copy", "-c:a", "aac", "-b:a", "192k", "-ac", "2"])
+        else:
+            cmd.extend(["-map", "0:v", "-c:v", "copy"])
+        if duration:
+            cmd.extend(["-t", str(duration)])
+        cmd.append(output_path)
+
+        return self.execute_ffmpeg_command(
+            cmd, "concat segments", expected_duration=duration, show_progress=False
+        )
+
+    def probe(self, file_path: str) -> dict:
+        """
+        Retrieves the format and all the streams of a media file with a single
+        ffprobe call. Results for local files are memoized by (path, mtime,
+        size), so probing the same file again is free until it changes.
+
+        Args:
+            file_path: Path or URL of the media file
+
+        Returns:
+            Dictionary with the ffprobe "format" and "streams"; it is shared
+            between callers and must not be modified
+
+        Raises:
+            Exception: If ffprobe fails
+        """
+        try:
+            stat = os.stat(file_path)
+            cache_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            # urls and missing files are not cached
+            cache_key = None
+
+        if cache_key is not None:
+            with _probe_cache_lock:
+                probe_data = _probe_cache.get(cache_key)
+                if probe_data is not None:
+                    _probe_cache.move_to_end(cache_key)
+                    return probe_data
+
+        cmd = [
+            "ffprobe",
+            "-v",
+            "quiet",
+            "-print_format",
+            "json",
+            "-show_format",
+            "-show_streams",
+            # adds extradata_hash to the streams, see stream_spec
+            "-show_data_hash",
+            "CRC32",
+            file_path,
+        ]
+        success, stdout, stderr = self.execute_ffprobe_command(cmd, "probe media")
+        if not success:
+            raise Exception(f"ffprobe failed: {stderr}")
+
+        probe_data = json.loads(stdout)
+        probe_data.setdefault("format", {})
+        probe_data.setdefault("streams", [])
+
+        if cache_key is not None:
+            with _probe_cache_lock:
+                _probe_cache[cache_key] = probe_data
+                while len(_probe_cache) > PROBE_CACHE_SIZE:
+                    _probe_cache.popitem(last=False)
+        return probe_data
+
+    @staticmethod
+    def first_stream(probe_data: dict, codec_type: str) -> dict:
+        """
+        Returns the first stream of the given type ('video' or 'audio') from
+        probe data, or None if the file has no such stream.
+        """
+        for stream in probe_data.get("streams", []):
+            if stream.get("codec_type") == codec_type:
+                return stream
+        return None
+
+    def has_audio(self, file_path: str) -> bool:
+        """
+        Checks whether a media file has an audio stream.
+
+        Args:
+            file_path: Path to the media file
+
+        Returns:
+            bool: True if the file has an audio stream, False otherwise
+        """
+        try:
+            return self.first_stream(self.probe(file_path), "audio") is not None
+        except Exception as e:
+            logger.bind(file_path=file_path, error=str(e)).error(
+                "error probing media"
+            )
+            return False
+
+    def get_video_info(self, file_path: str) -> dict:
+        """
+        Retrieves video information such as duration, width, height, codec, fps, etc.
+
+        Args:
+            file_path: Path to the video file
+
+        Returns:
+            Dictionary containing video information
+        """
+        try:
+            probe_data = self.probe(file_path)
+            format_info = probe_data["format"]
+            video_stream = self.first_stream(probe_data, "video")
+
+            if video_stream is None:
+                raise Exception("No video stream found in file")
 
             video_info = {
                 "duration": float(format_info.get("duration", 0)),
@@ -315,37 +859,13 @@ class MediaUtils:
             Dictionary containing audio information
         """
         try:
-            cmd = [
-                "ffprobe",
-                "-v",
-                "quiet",
-                "-print_format",
-                "json",
-                "-show_format",
-                "-show_streams",
-                "-select_streams",
-                "a:0",  # Select first audio stream
-                file_path,
-            ]
-
-            success, stdout, stderr = self.execute_ffprobe_command(
-                cmd, "get audio info"
-            )
+            probe_data = self.probe(file_path)
+            format_info = probe_data["format"]
+            audio_stream = self.first_stream(probe_data, "audio")
 
-            if not success:
-                raise Exception(f"ffprobe failed: {stderr}")
-
-            probe_data = json.loads(stdout)
-
-            # Extract format information
-            format_info = probe_data.get("format", {})
-            streams = probe_data.get("streams", [])
-
-            if not streams:
+            if audio_stream is None:
                 raise Exception("No audio stream found in file")
 
-            audio_stream = streams[0]
-
             audio_info = {
                 "duration": float(format_info.get("duration", 0)),
                 "channels": audio_stream.get("channels", 0),
@@ -513,6 +1033,7 @@ class MediaUtils:
         operation_name: str,
         expected_duration: float = None,
         show_progress: bool = True,
+        input_data: Iterable[bytes] = None,
     ) -> bool:
         """
         Execute an ffmpeg command with proper logging and progress tracking.
@@ -522,6 +1043,7 @@ class MediaUtils:
             operation_name: Name of the operation for logging
             expected_duration: Expected duration for progress calculation
             show_progress: Whether to show progress information
+            input_data: Optional chunks written to ffmpeg's stdin (pipe:0)
 
         Returns:
             bool: True if successful, False otherwise
@@ -533,13 +1055,34 @@ class MediaUtils:
 
             process = subprocess.Popen(
                 cmd,
+                stdin=subprocess.PIPE if input_data is not None else None,
                 stderr=subprocess.PIPE,
-                universal_newlines=True,
-                text=True,
             )
 
+            # stdin is fed from another thread while stderr is read here
+            feed_errors = []
+            feeder = None
+            if input_data is not None:
+                def feed():
+                    try:
+                        for chunk in input_data:
+                            process.stdin.write(chunk)
+                    except (BrokenPipeError, ValueError):
+                        # ffmpeg exited early, its return code reports why
+                        pass
+                    except Exception as e:
+                        feed_errors.append(e)
+                    finally:
+                        try:
+                            process.stdin.close()
+                        except OSError:
+                            pass
+
+                feeder = threading.Thread(target=feed, daemon=True)
+                feeder.start()
+
             # Process the output line by line as it becomes available
-            for line in process.stderr:
+            for line in io.TextIOWrapper(process.stderr, errors="replace"):
                 # Extract time information for progress tracking
                 if (
                     show_progress
@@ -556,6 +1099,7 @@ class MediaUtils:
 
                         # Calculate progress percentage
                         progress = min(100, (seconds / expected_duration) * 100)
+                        report_progress(progress)
                         logger.info(
                             f"{operation_name}: {progress:.2f}% complete (Time: {time_str} / Total: {self.format_time(expected_duration)})"
                         )
@@ -581,6 +1125,8 @@ class MediaUtils:
                         "frame=",
                         "fps=",
                         "[libx264",
+                        "[libx265",
+                        "Svt[",
                         "kb/s:",
                         "Qavg:",
                         "video:",
@@ -632,6 +1178,13 @@ class MediaUtils:
 
             # Wait for the process to complete and check the return code
             return_code = process.wait()
+            if feeder is not None:
+                feeder.join()
+            if feed_errors:
+                logger.bind(error=str(feed_errors[0]), operation=operation_name).error(
+                    f"failed to generate ffmpeg input for {operation_name}"
+                )
+                return False
             if return_code != 0:
                 logger.bind(return_code=return_code, operation=operation_name).error(
                     f"ffmpeg exited with code: {return_code} for {operation_name}"
@@ -707,6 +1260,67 @@ class MediaUtils:
             c in "0123456789abcdefABCDEF" for c in color[1:]
         )
 
+    def colorkey_color(self, color: str) -> str:
+        """
+        Converts a color name or hex code to the 0xRRGGBB form colorkey expects.
+        Unknown names fall back to black, the color of vintage dust overlays.
+        """
+        color = color.lstrip("#")
+        if color.lower() == "black":
+            return "0x000000"
+        if self.is_hex_color(color):
+            return f"0x{color.upper()}"
+        if color.startswith("0x"):
+            return color
+        # Handle named colors
+        color_map = {
+            "green": "0x00FF00",
+            "blue": "0x0000FF",
+            "red": "0xFF0000",
+            "white": "0xFFFFFF"
+        }
+        return color_map.get(color.lower(), "0x000000")
+
+    @staticmethod
+    def colorkey_overlay_filter(
+        base: str,
+        overlay: str,
+        output: str,
+        width: int,
+        height: int,
+        color: str,
+        similarity: float,
+        blend: float,
+    ) -> str:
+        """
+        Returns the filter graph keying out a color of the overlay and laying
+        it over the base stream until the base ends.
+
+        Args:
+            base: Label of the base video, e.g. '[0:v]'
+            overlay: Label of the (looped) overlay video, e.g. '[1:v]'
+            output: Label of the output, e.g. '[v]'
+            width: Width of the base video
+            height: Height of the base video
+            color: Color to key out, see colorkey_color
+            similarity: Similarity radius of the key color
+            blend: Blend of the pixels outside the similarity radius
+        """
+        # Ensure overlay has alpha by converting to RGBA and scale to base size
+        key_label = f"[ck{output.strip('[]')}]"
+        return (
+            f"{overlay}scale={width}:{height},format=rgba,colorkey={color}:{similarity}:{blend}{key_label};"
+            f"{base}{key_label}overlay=shortest=1:eof_action=repeat{output}"
+        )
+
+    @staticmethod
+    def vintage_filter(grain_strength: int = 8, vignette_intensity: float = 0.1) -> str:
+        """Returns the film grain and vignette filter chain of the vintage effect."""
+        # The vignette filter in FFmpeg uses an expression. 'PI/60' is a subtle start.
+        # A higher divisor means a more subtle vignette. We can link it to intensity.
+        vignette_angle = f"PI/{max(2, 60 * (1 - vignette_intensity))}"
+        return f"noise=alls={grain_strength}:allf=t+u,vignette='{vignette_angle}'"
+
     def colorkey_overlay(
         self,
         input_video_path: str,
@@ -715,11 +1329,17 @@ class MediaUtils:
         color: str = "black",
         similarity: float = 0.15,
         blend: float = 0.2,
+        encoder_profile: str = None,
+        video_encoder: str = None,
+        encoder_threads: int = None,
+        encoder_tune: str = None,
     ):
         """
         Applies a colorkey overlay to a video using FFmpeg.
         Loops the overlay to match the duration of the main video.
         Perfect for vintage dust/scratch overlays.
+        The encoder profile, encoder, threads and tune are optional, see
+        video/encoders.py.
         """
         start = time.time()
         info = self.get_video_info(input_video_path)
@@ -731,22 +1351,8 @@ class MediaUtils:
             logger.error("Failed to get required video info from input video")
             return False
 
-        # Enhanced color handling for vintage effects
-        color = color.lstrip("#")
-        if color.lower() == "black":
-            color = "0x000000"
-        elif self.is_hex_color(color):
-            color = f"0x{color.upper()}"
-        elif not color.startswith("0x"):
-            # Handle named colors
-            color_map = {
-                "green": "0x00FF00",
-                "blue": "0x0000FF",
-                "red": "0xFF0000",
-                "white": "0xFFFFFF"
-            }
-            color = color_map.get(color.lower(), "0x000000")
-        
+        color = self.colorkey_color(color)
+
         context_logger = logger.bind(
             input_video_path=input_video_path,
             overlay_video_path=overlay_video_path,
@@ -758,11 +1364,8 @@ class MediaUtils:
         )
         context_logger.debug("Starting enhanced colorkey overlay process for vintage effect")
 
-        # Enhanced FFmpeg command for better vintage texture overlay
-        # Ensure overlay has alpha by converting to RGBA and scale to base size
-        filter_complex = (
-            f"[1:v]scale={width}:{height},format=rgba,colorkey={color}:{similarity}:{blend}[ckout];"
-            f"[0:v][ckout]overlay=shortest=1:eof_action=repeat[v]"
+        filter_complex = self.colorkey_overlay_filter(
+            "[0:v]", "[1:v]", "[v]", width, height, color, similarity, blend
         )
         cmd = [
             self.ffmpeg_path, "-y",
@@ -772,9 +1375,7 @@ class MediaUtils:
             "-filter_complex", filter_complex,
             "-map", "[v]",
             "-map", "0:a?",  # Use the audio from the input video if it exists
-            "-c:v", "libx264",
-            "-preset", "fast",  # Better quality than ultrafast
-            "-crf", "22",  # Slightly higher quality
+            *encoder_args(encoder_profile, "quality", video_encoder, encoder_threads, encoder_tune),
             "-c:a", "copy",
             "-t", str(video_duration),
             output_video_path,
@@ -809,33 +1410,33 @@ class MediaUtils:
         output_path: str,
         grain_strength: int = 8,
         vignette_intensity: float = 0.1,
+        encoder_profile: str = None,
+        video_encoder: str = None,
+        encoder_threads: int = None,
+        encoder_tune: str = None,
     ) -> bool:
         """
         Applies a vintage filter with film grain and a vignette to a video.
+        The encoder profile, encoder, threads and tune are optional, see
+        video/encoders.py.
         """
         start = time.time()
         video_info = self.get_video_info(input_path)
         expected_duration = video_info.get("duration", 0)
 
-        # The vignette filter in FFmpeg uses an expression. 'PI/60' is a subtle start.
-        # A higher divisor means a more subtle vignette. We can link it to intensity.
-        vignette_angle = f"PI/{max(2, 60 * (1 - vignette_intensity))}"
-
         context_logger = logger.bind(
             input_path=input_path,
             output_path=output_path,
             grain_strength=grain_strength,
-            vignette_angle=vignette_angle,
+            vignette_intensity=vignette_intensity,
         )
         context_logger.debug("Applying vintage filter")
 
         cmd = [
             self.ffmpeg_path, "-y",
             "-i", input_path,
-            "-vf", f"noise=alls={grain_strength}:allf=t+u,vignette='{vignette_angle}'",
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "22",
+            "-vf", self.vintage_filter(grain_strength, vignette_intensity),
+            *encoder_args(encoder_profile, "quality", video_encoder, encoder_threads, encoder_tune),
             "-c:a", "copy",
             output_path,
         ]
@@ -920,6 +1521,10 @@ class MediaUtils:
         colorkey_color: str = "black",
         colorkey_similarity: float = 0.1,
         colorkey_blend: float = 0.1,
+        encoder_profile: str = None,
+        video_encoder: str = None,
+        encoder_threads: int = None,
+        encoder_tune: str = None,
     ) -> bool:
         """
         Applies a video overlay to a video, scaling the overlay to match the input video's dimensions
@@ -934,6 +1539,10 @@ class MediaUtils:
             colorkey_color: Color to make transparent (default: "black")
             colorkey_similarity: Similarity threshold for color removal (0.0-1.0, default: 0.1)
             colorkey_blend: Blend factor for color removal (0.0-1.0, default: 0.1)
+            encoder_profile: Optional encoder profile, see video/encoders.py
+            video_encoder: Optional video encoder, defaults to VIDEO_ENCODER
+            encoder_threads: Optional encoder threads, defaults to ENCODER_THREADS
+            encoder_tune: Optional encoder tune, defaults to ENCODER_TUNE
         """
         start = time.time()
         video_info = self.get_video_info(input_video_path)
@@ -984,9 +1593,7 @@ class MediaUtils:
             "-map", "[v]",
             "-map", "0:a?",
             "-c:a", "copy",
-            "-c:v", "libx264",
-            "-preset", "fast",
-            "-crf", "22",
+            *encoder_args(encoder_profile, "quality", video_encoder, encoder_threads, encoder_tune),
             output_path,
         ]
 
@@ -997,3 +1604,151 @@ class MediaUtils:
         else:
             context_logger.error("Failed to apply video overlay")
             return False
+
+    def render_pipeline(
+        self,
+        video_paths: list,
+        operations: list,
+        output_path: str,
+        encoder_profile: str = None,
+        video_encoder: str = None,
+        encoder_threads: int = None,
+        encoder_tune: str = None,
+    ) -> bool:
+        """
+        Renders a chain of operations over the concatenated videos with a
+        single filter graph, so the video is decoded and encoded once instead
+        of once per operation.
+
+        Args:
+            video_paths: Videos forming the timeline, merged in order
+            operations: Operations applied in order to the whole timeline:
+                {"type": "captions", "subtitle_path": str}
+                {"type": "vintage", "grain_strength": int, "vignette_intensity": float}
+                {"type": "overlay", "overlay_path": str, "color": str,
+                 "similarity": float, "blend": float}
+                {"type": "music", "audio_path": str, "volume": float}
+            output_path: Path for the output video
+            encoder_profile: Optional encoder profile, see video/encoders.py
+            video_encoder: Optional video encoder, defaults to VIDEO_ENCODER
+            encoder_threads: Optional encoder threads, defaults to ENCODER_THREADS
+            encoder_tune: Optional encoder tune, defaults to ENCODER_TUNE
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        if not video_paths:
+            logger.error("no video paths provided for the pipeline")
+            return False
+
+        start = time.time()
+        context_logger = logger.bind(
+            number_of_videos=len(video_paths),
+            operations=[operation["type"] for operation in operations],
+            output_path=output_path,
+        )
+
+        video_infos = [self.get_video_info(path) for path in video_paths]
+        if not all(video_infos):
+            context_logger.error("failed to get video info from the inputs")
+            return False
+        width = video_infos[0]["width"]
+        height = video_infos[0]["height"]
+        duration = sum(info.get("duration", 0) for info in video_infos)
+
+        inputs = []
+        for path in video_paths:
+            inputs.extend(["-i", path])
+        input_count = len(video_paths)
+        filters = []
+
+        # timeline: the same normalization and concat as merge_videos
+        if len(video_paths) == 1 and self.has_audio(video_paths[0]):
+            video_label, audio_label = "[0:v]", "[0:a]"
+        else:
+            fps = self.frame_rate(self.probe(video_paths[0])) or 30
+            concat_inputs = ""
+            for i, (path, info) in enumerate(zip(video_paths, video_infos)):
+                filters.append(
+                    f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,fps={fps},format=yuv420p,setsar=1[v{i}n]"
+                )
+                if self.has_audio(path):
+                    filters.append(
+                        f"[{i}:a]aformat=sample_rates=48000:channel_layouts=stereo[a{i}n]"
+                    )
+                else:
+                    filters.append(
+                        f"anullsrc=channel_layout=stereo:sample_rate=48000:duration={info.get('duration', 10)}[a{i}n]"
+                    )
+                concat_inputs += f"[v{i}n][a{i}n]"
+            filters.append(
+                f"{concat_inputs}concat=n={len(video_paths)}:v=1:a=1[timeline_v][timeline_a]"
+            )
+            video_label, audio_label = "[timeline_v]", "[timeline_a]"
+
+        for step, operation in enumerate(operations):
+            operation_type = operation["type"]
+            output_label = f"[step{step}]"
+            if operation_type == "captions":
+                filters.append(
+                    f"{video_label}subtitles={operation['subtitle_path']}{output_label}"
+                )
+                video_label = output_label
+            elif operation_type == "vintage":
+                vintage = self.vintage_filter(
+                    operation.get("grain_strength", 8),
+                    operation.get("vignette_intensity", 0.1),
+                )
+                filters.append(f"{video_label}{vintage}{output_label}")
+                video_label = output_label
+            elif operation_type == "overlay":
+                inputs.extend(["-stream_loop", "-1", "-i", operation["overlay_path"]])
+                filters.append(
+                    self.colorkey_overlay_filter(
+                        video_label,
+                        f"[{input_count}:v]",
+                        output_label,
+                        width,
+                        height,
+                        self.colorkey_color(operation.get("color", "black")),
+                        operation.get("similarity", 0.15),
+                        operation.get("blend", 0.2),
+                    )
+                )
+                input_count += 1
+                video_label = output_label
+            elif operation_type == "music":
+                inputs.extend(["-stream_loop", "-1", "-i", operation["audio_path"]])
+                filters.append(
+                    f"[{input_count}:a]volume={operation.get('volume', 0.5)}[bg{step}];"
+                    f"{audio_label}[bg{step}]amix=inputs=2:duration=first{output_label}"
+                )
+                input_count += 1
+                audio_label = output_label
+            else:
+                context_logger.bind(operation=operation_type).error("unknown pipeline operation")
+                return False
+
+        cmd = [self.ffmpeg_path, "-y", *inputs]
+        if filters:
+            cmd.extend(["-filter_complex", ";".join(filters)])
+        # input streams, unlike filter outputs, are mapped without brackets
+        for label in (video_label, audio_label):
+            cmd.extend(["-map", label.strip("[]") if ":" in label else label])
+        cmd.extend(encoder_args(encoder_profile, "balanced", video_encoder, encoder_threads, encoder_tune))
+        cmd.extend(["-c:a", "aac", "-b:a", "192k", "-t", str(duration), output_path])
+
+        context_logger.bind(filter_complex=";".join(filters)).debug("rendering pipeline")
+        success = self.execute_ffmpeg_command(
+            cmd,
+            "render pipeline",
+            expected_duration=duration,
+            show_progress=True,
+        )
+        if success:
+            context_logger.bind(execution_time=time.time() - start).debug(
+                "pipeline rendered successfully"
+            )
+        else:
+            context_logger.error("ffmpeg failed to render the pipeline")
+        return success
@@ -0,0 +1,262 @@
+import copy
+import gc
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, List
+import torch
+from chatterbox.tts import ChatterboxTTS
+from kokoro import KModel, KPipeline
+from loguru import logger
+from video.config import (
+    device,
+    kokoro_max_pipelines,
+    chatterbox_idle_ttl,
+    chatterbox_replicas,
+)
+
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+
+
+class KokoroPipelinePool:
+    """
+    Process-wide registry of Kokoro pipelines keyed by lang_code.
+
+    The Kokoro weights are language independent, so a single KModel is loaded
+    once and shared by every pipeline; only the per-language G2P pipelines are
+    kept in an LRU registry, bounded by max_pipelines.
+    """
+
+    def __init__(self, max_pipelines: int = 2, repo_id: str = KOKORO_REPO_ID):
+        self.max_pipelines = max(1, int(max_pipelines))
+        self.repo_id = repo_id
+        self._model = None
+        self._pipelines = OrderedDict()
+        self._pipeline_locks = {}
+        self._lock = threading.Lock()
+
+    def _get_model(self) -> KModel:
+        if self._model is None:
+            start = time.time()
+            self._model = KModel(repo_id=self.repo_id).to(device.type).eval()
+            logger.bind(
+                repo_id=self.repo_id,
+                device=device.type,
+                execution_time=time.time() - start,
+            ).debug("kokoro model loaded")
+        return self._model
+
+    def get_pipeline(self, lang_code: str) -> KPipeline:
+        """
+        Returns the resident pipeline for the language, loading it on first use
+        and evicting the least recently used language when the pool is full.
+        """
+        with self._lock:
+            pipeline = self._pipelines.get(lang_code)
+            if pipeline is not None:
+                self._pipelines.move_to_end(lang_code)
+                return pipeline
+
+            start = time.time()
+            pipeline = KPipeline(
+                lang_code=lang_code,
+                repo_id=self.repo_id,
+                model=self._get_model(),
+                device=device.type,
+            )
+            self._pipelines[lang_code] = pipeline
+            self._pipeline_locks.setdefault(lang_code, threading.Lock())
+            logger.bind(
+                lang_code=lang_code,
+                execution_time=time.time() - start,
+            ).debug("kokoro pipeline loaded")
+
+            while len(self._pipelines) > self.max_pipelines:
+                evicted_lang_code, _ = self._pipelines.popitem(last=False)
+                logger.bind(lang_code=evicted_lang_code).debug(
+                    "kokoro pipeline evicted"
+                )
+            return pipeline
+
+    @contextmanager
+    def acquire(self, lang_code: str, voice: str = None) -> Iterator[KPipeline]:
+        """
+        Yields the pipeline for the language with its voice tensors loaded.
+        Generation on the same language is serialized, since the G2P
+        frontends are not safe to share between threads.
+        """
+        pipeline = self.get_pipeline(lang_code)
+        with self._pipeline_locks[lang_code]:
+            if voice:
+                pipeline.load_voice(voice)
+            yield pipeline
+
+    @contextmanager
+    def acquire_g2p(self, lang_code: str) -> Iterator[KPipeline]:
+        """
+        Yields the pipeline for the language with its model detached, so
+        calling it only runs G2P and yields results without audio. The
+        inference can then run outside of the language lock, see
+        synthesize.
+        """
+        with self.acquire(lang_code) as pipeline:
+            model = pipeline.model
+            pipeline.model = None
+            try:
+                yield pipeline
+            finally:
+                pipeline.model = model
+
+    def synthesize(self, phonemes: str, pack: torch.FloatTensor, speed: float = 1) -> torch.FloatTensor:
+        """
+        Runs the shared model on phonemes produced by acquire_g2p, with the
+        voice pack returned by the pipeline's load_voice. Inference doesn't
+        touch the G2P state, so it is safe to call concurrently.
+        """
+        return KPipeline.infer(self._get_model(), phonemes, pack, speed).audio
+
+    def preload(self, voices: List[str]):
+        """
+        Loads the pipelines and voice tensors for the given voices, so the
+        first request using them only pays for inference.
+        """
+        from video.tts import LANGUAGE_VOICE_MAP
+
+        for voice in voices:
+            lang_code = LANGUAGE_VOICE_MAP.get(voice, {}).get("lang_code")
+            if not lang_code:
+                logger.bind(voice=voice).warning("unknown kokoro voice, skipping preload")
+                continue
+            with self.acquire(lang_code, voice):
+                pass
+            logger.bind(voice=voice, lang_code=lang_code).debug("kokoro voice preloaded")
+
+
+kokoro_pipelines = KokoroPipelinePool(max_pipelines=kokoro_max_pipelines)
+
+
+class ChatterboxModelManager:
+    """
+    Shares ChatterboxTTS model replicas between requests.
+
+    Replicas are loaded on first use (or at startup), each one runs a single
+    generation at a time, and they are all unloaded after idle_ttl seconds
+    without use so the memory is reclaimed when the endpoint is idle. An
+    idle_ttl of 0 keeps the models resident forever. With more than one
+    replica, independent chunks of a long text can be generated concurrently.
+    """
+
+    WARM_UP_TEXT = "Hello, this is a warm up."
+
+    def __init__(self, idle_ttl: float = 0, replicas: int = 1):
+        self.idle_ttl = idle_ttl
+        self.replicas = max(1, int(replicas))
+        self._models = []
+        self._free = []
+        self._default_conds = {}
+        self._in_use = 0
+        self._lock = threading.RLock()
+        self._available = threading.Condition(self._lock)
+        self._last_used = 0.0
+        self._unload_timer = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._models)
+
+    def _load_replica(self, warm_up: bool = False) -> ChatterboxTTS:
+        start = time.time()
+        model = ChatterboxTTS.from_pretrained(device=device.type)
+        self._default_conds[id(model)] = model.conds
+        self._models.append(model)
+        logger.bind(
+            device=device.type,
+            replica=len(self._models),
+            execution_time=time.time() - start,
+        ).debug("chatterbox model loaded")
+        if warm_up:
+            start = time.time()
+            model.generate(self.WARM_UP_TEXT)
+            logger.bind(execution_time=time.time() - start).debug(
+                "chatterbox model warmed up"
+            )
+        return model
+
+    def load(self, warm_up: bool = False):
+        """
+        Loads the replicas that are not resident yet, optionally running a
+        short generation on each so the first request does not pay for
+        kernel warm-up.
+        """
+        with self._lock:
+            while len(self._models) < self.replicas:
+                self._free.append(self._load_replica(warm_up))
+            self._touch()
+
+    @contextmanager
+    def acquire(self) -> Iterator[ChatterboxTTS]:
+        """
+        Yields a free replica, loading a new one while fewer than replicas
+        are resident and waiting otherwise. The built-in voice conditioning
+        is restored on every acquire, since callers cloning a voice replace it,
+        as a copy that generate can modify without changing the original.
+        """
+        with self._available:
+            while not self._free and len(self._models) >= self.replicas:
+                self._available.wait()
+            model = self._free.pop() if self._free else self._load_replica()
+            model.conds = copy.copy(self._default_conds[id(model)])
+            self._in_use += 1
+        try:
+            yield model
+        finally:
+            with self._available:
+                self._in_use -= 1
+                # the replica may have been unloaded while in use
+                if any(resident is model for resident in self._models):
+                    self._free.append(model)
+                self._touch()
+                self._available.notify()
+
+    def unload(self):
+        with self._lock:
+            if self._unload_timer:
+                self._unload_timer.cancel()
+                self._unload_timer = None
+            if not self._models:
+                return
+            self._models = []
+            self._free = []
+            self._default_conds = {}
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+            logger.debug("chatterbox model unloaded")
+
+    def _touch(self):
+        self._last_used = time.time()
+        if not self.idle_ttl:
+            return
+        if self._unload_timer:
+            self._unload_timer.cancel()
+        self._unload_timer = threading.Timer(self.idle_ttl, self._unload_if_idle)
+        self._unload_timer.daemon = True
+        self._unload_timer.start()
+
+    def _unload_if_idle(self):
+        # busy replicas are never unloaded; a use that started after the
+        # timer fired re-arms it when it finishes
+        with self._lock:
+            if self._in_use:
+                return
+            if time.time() - self._last_used >= self.idle_ttl:
+                logger.bind(idle_ttl=self.idle_ttl).debug(
+                    "chatterbox model idle, unloading"
+                )
+                self.unload()
+
+
+chatterbox_models = ChatterboxModelManager(
+    idle_ttl=chatterbox_idle_ttl, replicas=chatterbox_replicas
+)
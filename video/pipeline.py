@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable
+from loguru import logger
+from video.job_store import current_job_id, job_context
+
+
+class Pipeline:
+    """
+    A small DAG of named stages.
+
+    A stage starts as soon as all of its dependencies are done, so
+    independent stages run concurrently. Each stage receives the results of
+    its dependencies as keyword arguments named after them. The first failing
+    stage cancels the stages that haven't started and its exception is raised.
+    """
+
+    def __init__(self, name: str, max_workers: int = 4):
+        self.name = name
+        self.max_workers = max_workers
+        self._stages = {}
+
+    def add(self, name: str, fn: Callable, depends_on: Iterable[str] = ()):
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        depends_on = list(depends_on)
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError(f"Unknown dependency '{dependency}' for stage '{name}'")
+        self._stages[name] = {"fn": fn, "depends_on": depends_on}
+        return self
+
+    def run(self) -> Dict[str, object]:
+        """Runs the stages and returns their results by stage name."""
+        start = time.time()
+        job_id = current_job_id()
+        results = {}
+        remaining = dict(self._stages)
+        running = {}
+
+        def run_stage(name: str, fn: Callable, kwargs: dict):
+            # stages run on pool threads, so carry the job context over
+            with job_context(job_id):
+                stage_start = time.time()
+                result = fn(**kwargs)
+                logger.bind(
+                    pipeline=self.name,
+                    stage=name,
+                    execution_time=time.time() - stage_start,
+                ).debug("pipeline stage completed")
+                return result
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"pipeline-{self.name}"
+        ) as executor:
+            while remaining or running:
+                for name, stage in list(remaining.items()):
+                    if all(dependency in results for dependency in stage["depends_on"]):
+                        kwargs = {dependency: results[dependency] for dependency in stage["depends_on"]}
+                        running[executor.submit(run_stage, name, stage["fn"], kwargs)] = name
+                        del remaining[name]
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        for pending in running:
+                            pending.cancel()
+                        logger.bind(pipeline=self.name, stage=name, error=str(error)).error(
+                            "pipeline stage failed"
+                        )
+                        raise error
+                    results[name] = future.result()
+
+        logger.bind(pipeline=self.name, execution_time=time.time() - start).debug(
+            "pipeline completed"
+        )
+        return results
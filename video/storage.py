@@ -239,6 +239,25 @@ class Storage:
         return filename, file_path
 
 
+    def get_cache_dir(self, name: str) -> str:
+        """
+        Gets (and creates) a cache directory next to the media folders.
+        Cache directories are not media types, so their content can't be
+        accessed through media IDs.
+
+        Args:
+            name (str): Name of the cache, e.g., 'voice_conditioning'.
+
+        Returns:
+            str: Full path of the cache directory.
+        """
+        if not name or ".." in name or "/" in name or "\\" in name:
+            raise ValueError("Invalid cache name")
+
+        cache_dir = os.path.join(self.storage_path, "cache", name)
+        os.makedirs(cache_dir, exist_ok=True)
+        return cache_dir
+
     def create_tmp_file_id(self, media_id: str) -> str:
         """
         Creates a temporary filename for media upload.
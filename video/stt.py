@@ -1,19 +1,69 @@
-from faster_whisper import WhisperModel
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import time
+from faster_whisper import WhisperModel, decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 from loguru import logger
-from video.config import device, whisper_model, whisper_compute_type
+from video.config import (
+    device,
+    whisper_model,
+    whisper_compute_type,
+    whisper_num_workers,
+    whisper_cpu_threads,
+    whisper_chunk_length,
+)
+from video.cache import transcript_cache
 
 
 class STT:
-    def __init__(self):
+    def __init__(self, model_size: str = whisper_model, cpu_threads: int = whisper_cpu_threads):
+        """
+        Args:
+            model_size: Whisper model size, e.g., 'tiny', 'base' or 'small'.
+            cpu_threads: Threads used by each worker on CPU.
+        """
+        self.model_size = model_size
+        self.num_workers = max(1, whisper_num_workers)
+        start = time.time()
         self.model = WhisperModel(
-            model_size_or_path=whisper_model, 
-            compute_type=whisper_compute_type
+            model_size_or_path=model_size, 
+            compute_type=whisper_compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=self.num_workers,
         )
+        logger.bind(
+            model_size=model_size,
+            cpu_threads=cpu_threads,
+            num_workers=self.num_workers,
+            execution_time=time.time() - start,
+        ).debug("whisper model loaded")
+
+    def transcribe_stream(self, audio_path, language = None, beam_size=5):
+        """
+        Transcribes lazily, decoding the audio as the words are consumed.
+
+        Args:
+            audio_path: Audio file path or binary file object.
+            language: Language code, None to auto-detect it.
+            beam_size: Beam size for decoding.
+
+        Returns:
+            tuple: An iterator of word captions and the audio duration. The
+            transcript is cached once the iterator is fully consumed.
+        """
+        cache_key = None
+        if transcript_cache.enabled:
+            cache_key = transcript_cache.make_transcript_key(
+                audio_path, self.model_size, whisper_compute_type, language, beam_size
+            )
+            cached = transcript_cache.lookup(cache_key)
+            if cached is not None:
+                captions, duration = cached
+                return iter(captions), duration
 
-    def transcribe(self, audio_path, language = None, beam_size=5):
         logger.bind(
             device=device.type,
-            model_size=whisper_model,
+            model_size=self.model_size,
             compute_type=whisper_compute_type,
             audio_path=audio_path,
             language=language,
@@ -27,15 +77,148 @@ class STT:
             language=language,
         )
 
-        duration = info.duration
+        def words():
+            captions = []
+            for segment in segments:
+                for word in segment.words:
+                    caption = {
+                        "text": word.word,
+                        "start_ts": word.start,
+                        "end_ts": word.end,
+                    }
+                    if cache_key:
+                        captions.append(caption)
+                    yield caption
+            if cache_key:
+                transcript_cache.store(cache_key, captions, info.duration)
+
+        return words(), info.duration
+
+    def transcribe(self, audio_path, language = None, beam_size=5, parallel=False):
+        """
+        Transcribes the audio into word captions.
+
+        Args:
+            audio_path: Audio file path or binary file object.
+            language: Language code, None to auto-detect it.
+            beam_size: Beam size for decoding.
+            parallel: Split the audio on silence and transcribe the chunks
+                concurrently, see transcribe_parallel.
+
+        Returns:
+            tuple: The word captions and the audio duration.
+        """
+        if parallel:
+            return self.transcribe_parallel(
+                audio_path, language=language, beam_size=beam_size
+            )
+        words, duration = self.transcribe_stream(
+            audio_path, language=language, beam_size=beam_size
+        )
+        return list(words), duration
+
+    def split_on_silence(self, audio, chunk_length: float) -> List[Tuple[int, int]]:
+        """
+        Groups the speech regions found by the VAD into chunks of up to
+        chunk_length seconds, so every chunk starts and ends in silence.
+
+        Returns:
+            List[Tuple[int, int]]: Start and end sample of every chunk.
+        """
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        max_samples = int(chunk_length * sampling_rate)
+        chunks = []
+        for region in get_speech_timestamps(audio, VadOptions()):
+            if chunks and region["end"] - chunks[-1][0] <= max_samples:
+                chunks[-1][1] = region["end"]
+            else:
+                chunks.append([region["start"], region["end"]])
+        return [(start, end) for start, end in chunks]
+
+    def _transcribe_chunk(self, audio, offset: float, language, beam_size):
+        segments, info = self.model.transcribe(
+            audio,
+            beam_size=beam_size,
+            word_timestamps=True,
+            language=language,
+        )
         captions = []
         for segment in segments:
             for word in segment.words:
                 captions.append(
                     {
                         "text": word.word,
-                        "start_ts": word.start,
-                        "end_ts": word.end,
+                        "start_ts": offset + word.start,
+                        "end_ts": offset + word.end,
                     }
                 )
+        return captions, info.language
+
+    def transcribe_parallel(self, audio_path, language = None, beam_size=5):
+        """
+        Transcribes long audio by splitting it on silence and decoding the
+        chunks concurrently on the model workers (WHISPER_NUM_WORKERS), then
+        shifting the word timestamps by the chunk offsets.
+
+        When no language is given it is detected on the first chunk and
+        reused for the others, so every chunk is decoded the same way.
+        """
+        cache_key = None
+        if transcript_cache.enabled:
+            cache_key = transcript_cache.make_transcript_key(
+                audio_path, self.model_size, whisper_compute_type, language, beam_size,
+                mode="vad",
+            )
+            cached = transcript_cache.lookup(cache_key)
+            if cached is not None:
+                return cached
+
+        start = time.time()
+        sampling_rate = self.model.feature_extractor.sampling_rate
+        audio = decode_audio(audio_path, sampling_rate=sampling_rate)
+        duration = len(audio) / sampling_rate
+        chunks = self.split_on_silence(audio, whisper_chunk_length)
+        context_logger = logger.bind(
+            device=device.type,
+            model_size=self.model_size,
+            compute_type=whisper_compute_type,
+            duration=duration,
+            chunks=len(chunks),
+            workers=self.num_workers,
+        )
+        context_logger.debug("transcribing audio in parallel chunks with Whisper model")
+
+        results = []
+        if chunks:
+            first_start, first_end = chunks[0]
+            results.append(
+                self._transcribe_chunk(
+                    audio[first_start:first_end],
+                    first_start / sampling_rate,
+                    language,
+                    beam_size,
+                )
+            )
+            language = language or results[0][1]
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            results.extend(
+                executor.map(
+                    lambda chunk: self._transcribe_chunk(
+                        audio[chunk[0]:chunk[1]],
+                        chunk[0] / sampling_rate,
+                        language,
+                        beam_size,
+                    ),
+                    chunks[1:],
+                )
+            )
+
+        captions = [caption for chunk_captions, _ in results for caption in chunk_captions]
+        context_logger.bind(
+            execution_time=time.time() - start,
+            speedup=duration / (time.time() - start),
+        ).debug("parallel transcription completed")
+        if cache_key:
+            transcript_cache.store(cache_key, captions, duration)
         return captions, duration
@@ -1,18 +1,19 @@
 import re
 import time
 import warnings
-from typing import List
-from kokoro import KPipeline
-import numpy as np
-import soundfile as sf
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
 from loguru import logger
-import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
-from video.config import device
+from video.config import device, kokoro_parallel_workers
+from video.models import KOKORO_REPO_ID, kokoro_pipelines, chatterbox_models
+from video.cache import package_version, tts_cache
+from video.audio import AudioWriter, audio_format, write_audio
 
 # Suppress PyTorch warnings
 warnings.filterwarnings("ignore")
 
+KOKORO_SAMPLE_RATE = 24000
+
 LANGUAGE_CONFIG = {
     "en-us": {
         "lang_code": "a",
@@ -96,6 +97,127 @@ for lang, voices in LANGUAGE_VOICE_CONFIG.items():
             print(f"Warning: Language {lang} not found in LANGUAGE_CONFIG")
 
 
+# Language-specific sentence boundary patterns
+SENTENCE_BOUNDARY_PATTERNS = {
+    "a": r"(?<=[.!?])\s+(?=[A-Z_])",  # English
+    "e": r"(?<=[.!?])\s+(?=[A-ZÁÉÍÓÚÑÜ¿¡_])",  # Spanish - allow inverted punctuation after boundaries
+    "f": r"(?<=[.!?])\s+(?=[A-ZÁÀÂÄÇÉÈÊËÏÎÔÖÙÛÜŸ_])",  # French
+    "h": r"(?<=[।!?])\s+",  # Hindi: Split after devanagari danda
+    "i": r"(?<=[.!?])\s+(?=[A-ZÀÁÂÃÄÅÆÇÈÉÊËÌÍÎÏÐÑÒÓÔÕÖ×ØÙÚÛÜÝÞß_])",  # Italian
+    "p": r"(?<=[.!?])\s+(?=[A-ZÀÁÂÃÄÅÇÈÉÊËÌÍÎÏÑÒÓÔÕÖÙÚÛÜÝ_])",  # Portuguese
+    "z": r"(?<=[。！？])",  # Chinese: Split after Chinese punctuation
+}
+
+# Common abbreviations that shouldn't trigger sentence breaks
+SENTENCE_ABBREVIATIONS = {
+    "a": {
+        "Mr.",
+        "Mrs.",
+        "Ms.",
+        "Dr.",
+        "Prof.",
+        "Sr.",
+        "Jr.",
+        "Inc.",
+        "Corp.",
+        "Ltd.",
+        "Co.",
+        "etc.",
+        "vs.",
+        "eg.",
+        "i.e.",
+        "e.g.",
+        "Vol.",
+        "Ch.",
+        "Fig.",
+        "No.",
+        "p.",
+        "pp.",
+    },  # English
+    "e": {
+        "Sr.",
+        "Sra.",
+        "Dr.",
+        "Dra.",
+        "Prof.",
+        "etc.",
+        "pág.",
+        "art.",
+        "núm.",
+        "cap.",
+        "vol.",
+    },  # Spanish
+    "f": {
+        "M.",
+        "Mme.",
+        "Dr.",
+        "Prof.",
+        "etc.",
+        "art.",
+        "p.",
+        "vol.",
+        "ch.",
+        "fig.",
+        "n°",
+    },  # French
+    "h": {"श्री", "श्रीमती", "डॉ.", "प्रो.", "etc.", "पृ.", "अध."},  # Hindi
+    "i": {
+        "Sig.",
+        "Sig.ra",
+        "Dr.",
+        "Prof.",
+        "ecc.",
+        "pag.",
+        "art.",
+        "n.",
+        "vol.",
+        "cap.",
+        "fig.",
+    },  # Italian
+    "p": {
+        "Sr.",
+        "Sra.",
+        "Dr.",
+        "Dra.",
+        "Prof.",
+        "etc.",
+        "pág.",
+        "art.",
+        "n.º",
+        "vol.",
+        "cap.",
+    },  # Portuguese
+    "z": {"先生", "女士", "博士", "教授", "等等", "第", "页", "章"},  # Chinese
+}
+
+
+def compile_sentence_splitter(lang_code: str) -> re.Pattern:
+    """
+    Compiles the sentence boundary pattern of the language with a negative
+    lookbehind for every abbreviation ending in punctuation, so a boundary
+    right after an abbreviation is skipped in the same pass as the split.
+    The word boundary keeps e.g. 'p.' from matching the end of 'stop.'.
+    """
+    punctuation = ".!?।。！？"
+    guards = "".join(
+        rf"(?<!\b{re.escape(abbrev)})"
+        for abbrev in sorted(SENTENCE_ABBREVIATIONS.get(lang_code, ()))
+        if abbrev[-1] in punctuation
+    )
+    if not guards:
+        return re.compile(SENTENCE_BOUNDARY_PATTERNS[lang_code])
+    # only check the abbreviations right after punctuation
+    return re.compile(
+        rf"(?<=[{punctuation}])" + guards + SENTENCE_BOUNDARY_PATTERNS[lang_code]
+    )
+
+
+SENTENCE_SPLITTERS = {
+    lang_code: compile_sentence_splitter(lang_code)
+    for lang_code in SENTENCE_BOUNDARY_PATTERNS
+}
+
+
 class TTS:
     def break_text_into_sentences(self, text, lang_code) -> List[str]:
         """
@@ -104,127 +226,101 @@ class TTS:
         if not text or not text.strip():
             return []
 
-        # Language-specific sentence boundary patterns
-        patterns = {
-            "a": r"(?<=[.!?])\s+(?=[A-Z_])",  # English
-            "e": r"(?<=[.!?])\s+(?=[A-ZÁÉÍÓÚÑÜ¿¡_])",  # Spanish - allow inverted punctuation after boundaries
-            "f": r"(?<=[.!?])\s+(?=[A-ZÁÀÂÄÇÉÈÊËÏÎÔÖÙÛÜŸ_])",  # French
-            "h": r"(?<=[।!?])\s+",  # Hindi: Split after devanagari danda
-            "i": r"(?<=[.!?])\s+(?=[A-ZÀÁÂÃÄÅÆÇÈÉÊËÌÍÎÏÐÑÒÓÔÕÖ×ØÙÚÛÜÝÞß_])",  # Italian
-            "p": r"(?<=[.!?])\s+(?=[A-ZÀÁÂÃÄÅÇÈÉÊËÌÍÎÏÑÒÓÔÕÖÙÚÛÜÝ_])",  # Portuguese
-            "z": r"(?<=[。！？])",  # Chinese: Split after Chinese punctuation
-        }
-
-        # Common abbreviations that shouldn't trigger sentence breaks
-        abbreviations = {
-            "a": {
-                "Mr.",
-                "Mrs.",
-                "Ms.",
-                "Dr.",
-                "Prof.",
-                "Sr.",
-                "Jr.",
-                "Inc.",
-                "Corp.",
-                "Ltd.",
-                "Co.",
-                "etc.",
-                "vs.",
-                "eg.",
-                "i.e.",
-                "e.g.",
-                "Vol.",
-                "Ch.",
-                "Fig.",
-                "No.",
-                "p.",
-                "pp.",
-            },  # English
-            "e": {
-                "Sr.",
-                "Sra.",
-                "Dr.",
-                "Dra.",
-                "Prof.",
-                "etc.",
-                "pág.",
-                "art.",
-                "núm.",
-                "cap.",
-                "vol.",
-            },  # Spanish
-            "f": {
-                "M.",
-                "Mme.",
-                "Dr.",
-                "Prof.",
-                "etc.",
-                "art.",
-                "p.",
-                "vol.",
-                "ch.",
-                "fig.",
-                "n°",
-            },  # French
-            "h": {"श्री", "श्रीमती", "डॉ.", "प्रो.", "etc.", "पृ.", "अध."},  # Hindi
-            "i": {
-                "Sig.",
-                "Sig.ra",
-                "Dr.",
-                "Prof.",
-                "ecc.",
-                "pag.",
-                "art.",
-                "n.",
-                "vol.",
-                "cap.",
-                "fig.",
-            },  # Italian
-            "p": {
-                "Sr.",
-                "Sra.",
-                "Dr.",
-                "Dra.",
-                "Prof.",
-                "etc.",
-                "pág.",
-                "art.",
-                "n.º",
-                "vol.",
-                "cap.",
-            },  # Portuguese
-            "z": {"先生", "女士", "博士", "教授", "等等", "第", "页", "章"},  # Chinese
-        }
-
-        abbrevs = abbreviations.get(lang_code, set())
-
-        # Protect abbreviations by temporarily replacing them
-        protected_text = text
-        replacements = {}
-        for i, abbrev in enumerate(abbrevs):
-            placeholder = f"__ABBREV_{i}__"
-            protected_text = protected_text.replace(abbrev, placeholder)
-            replacements[placeholder] = abbrev
-
-        # Apply the regex splitting
-        pattern = patterns.get(lang_code, patterns["a"])
-        sentences = re.split(pattern, protected_text.strip())
-
-        # Restore abbreviations and clean up
-        restored_sentences = []
-        for sentence in sentences:
-            for placeholder, original in replacements.items():
-                sentence = sentence.replace(placeholder, original)
-            sentence = sentence.strip()
-            if sentence:
-                restored_sentences.append(sentence)
+        splitter = SENTENCE_SPLITTERS.get(lang_code, SENTENCE_SPLITTERS["a"])
+        sentences = [
+            sentence.strip()
+            for sentence in splitter.split(text.strip())
+            if sentence.strip()
+        ]
+        return sentences if sentences else [text.strip()]
+
+    def proportional_word_captions(
+        self, text: str, start_ts: float, end_ts: float
+    ) -> List[dict]:
+        """
+        Splits a caption into words (characters for CJK text) and spreads its
+        duration over them proportionally to their length.
+        """
+        text = text.strip()
+        if not text:
+            return []
+        is_cjk = any("\u4e00" <= char <= "\u9fff" for char in text)
+        words = [char for char in text if not char.isspace()] if is_cjk else text.split()
+        # count the gap after each word, so short words don't get squeezed
+        weights = [len(word) + (0 if is_cjk else 1) for word in words]
+        duration_per_weight = (end_ts - start_ts) / sum(weights)
 
-        return restored_sentences if restored_sentences else [text.strip()]
+        captions = []
+        current_ts = start_ts
+        for word, weight in zip(words, weights):
+            word_end_ts = current_ts + weight * duration_per_weight
+            captions.append(
+                {
+                    "text": word if is_cjk or not captions else " " + word,
+                    "start_ts": current_ts,
+                    "end_ts": word_end_ts,
+                }
+            )
+            current_ts = word_end_ts
+        captions[-1]["end_ts"] = end_ts
+        return captions
+
+    def _kokoro_international_sequential(
+        self, sentences: List[str], voice: str, lang_code: str, speed=1
+    ) -> Iterator[tuple]:
+        """Generates the audio of each sentence in turn, yielding (chunk text, audio) pairs."""
+        with kokoro_pipelines.acquire(lang_code, voice) as pipeline:
+            for sentence in sentences:
+                logger.debug(
+                    "Processing sentence",
+                    sentence=sentence,
+                    voice=voice,
+                    speed=speed,
+                )
+                for result in pipeline(sentence, voice=voice, speed=speed):
+                    yield result.graphemes or sentence, result.audio
+
+    def _kokoro_international_parallel(
+        self, sentences: List[str], voice: str, lang_code: str, speed=1, workers=2
+    ) -> Iterator[tuple]:
+        """
+        Runs G2P for all sentences first, then the model inference of the
+        chunks on a pool of threads, yielding (chunk text, audio) pairs in
+        the original order. Only the G2P step holds the language lock.
+        """
+        phonemized = []
+        with kokoro_pipelines.acquire_g2p(lang_code) as pipeline:
+            pack = pipeline.load_voice(voice).to(device.type)
+            for sentence in sentences:
+                for result in pipeline(sentence, voice=voice, speed=speed):
+                    phonemized.append((result.graphemes or sentence, result.phonemes))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            audios = executor.map(
+                lambda item: kokoro_pipelines.synthesize(item[1], pack, speed),
+                phonemized,
+            )
+            for (chunk_text, _), audio in zip(phonemized, audios):
+                yield chunk_text, audio
 
     def kokoro_international(
-        self, text: str, output_path: str, voice: str, lang_code: str, speed=1
+        self,
+        text: str,
+        output_path: str,
+        voice: str,
+        lang_code: str,
+        speed=1,
+        word_timestamps: bool = False,
+        workers: int = None,
     ) -> tuple[str, List[dict], float]:
+        """
+        Generates speech for non-English voices. Kokoro doesn't return token
+        timings for these languages, so captions span each generated chunk,
+        or each word of it with word_timestamps, timed proportionally.
+
+        With more than one worker (KOKORO_PARALLEL_WORKERS by default) the
+        chunks are synthesized concurrently after a sequential G2P pass.
+        """
         if not text or not text.strip():
             raise ValueError("Text cannot be empty or whitespace")
         lang_code = LANGUAGE_VOICE_MAP.get(voice, {}).get("lang_code")
@@ -244,35 +340,39 @@ class TTS:
             num_sentences=len(sentences),
         )
 
-        # generate the audio for each sentence
-        audio_data = []
-        captions = []
-        full_audio_length = 0
-        pipeline = KPipeline(lang_code=lang_code, repo_id="hexgrad/Kokoro-82M", device=device)
-        for sentence in sentences:
-            context_logger.debug(
-                "Processing sentence",
-                sentence=sentence,
-                voice=voice,
-                speed=speed,
+        if workers is None:
+            workers = kokoro_parallel_workers
+        if workers > 1 and len(sentences) > 1:
+            chunks = self._kokoro_international_parallel(
+                sentences, voice, lang_code, speed, workers
+            )
+        else:
+            chunks = self._kokoro_international_sequential(
+                sentences, voice, lang_code, speed
             )
-            generator = pipeline(sentence, voice=voice, speed=speed)
 
-            for i, result in enumerate(generator):
-                context_logger.debug(
-                    "Generated audio for sentence",
-                )
-                data = result.audio
-                audio_length = len(data) / 24000
-                audio_data.append(data)
-                # since there are no tokens, we can just use the sentence as the text
-                captions.append(
-                    {
-                        "text": sentence,
-                        "start_ts": full_audio_length,
-                        "end_ts": full_audio_length + audio_length,
-                    }
-                )
+        captions = []
+        full_audio_length = 0
+        with AudioWriter(output_path, KOKORO_SAMPLE_RATE) as writer:
+            for chunk_text, data in chunks:
+                audio_length = writer.write(data)
+                # since there are no tokens, we can just use the chunk text as the text
+                if word_timestamps:
+                    captions.extend(
+                        self.proportional_word_captions(
+                            chunk_text,
+                            full_audio_length,
+                            full_audio_length + audio_length,
+                        )
+                    )
+                else:
+                    captions.append(
+                        {
+                            "text": chunk_text,
+                            "start_ts": full_audio_length,
+                            "end_ts": full_audio_length + audio_length,
+                        }
+                    )
                 full_audio_length += audio_length
 
         context_logger = context_logger.bind(
@@ -283,10 +383,6 @@ class TTS:
         context_logger.debug(
             "TTS generation (international) completed with kokoro",
         )
-
-        audio_data = np.concatenate(audio_data)
-        audio_data = np.column_stack((audio_data, audio_data))
-        sf.write(output_path, audio_data, 24000, format="WAV")
         return captions, full_audio_length
 
     def kokoro_english(
@@ -313,45 +409,40 @@ class TTS:
         context_logger.debug("Starting TTS generation with kokoro")
         if not text or not text.strip():
             raise ValueError("Text cannot be empty or whitespace")
-        pipeline = KPipeline(lang_code=lang_code, repo_id="hexgrad/Kokoro-82M", device=device.type)
-
-        generator = pipeline(text, voice=voice, speed=speed)
-
         captions = []
-        audio_data = []
         full_audio_length = 0
-        for _, result in enumerate(generator):
-            data = result.audio
-            audio_length = len(data) / 24000
-            audio_data.append(data)
-            if result.tokens:
-                tokens = result.tokens
-                for t in tokens:
-                    if t.start_ts is None or t.end_ts is None:
-                        if captions:
-                            captions[-1]["text"] += t.text
-                            captions[-1]["end_ts"] = full_audio_length + audio_length
-                        continue
-                    try:
-                        captions.append(
-                            {
-                                "text": t.text,
-                                "start_ts": full_audio_length + t.start_ts,
-                                "end_ts": full_audio_length + t.end_ts,
-                            }
-                        )
-                    except Exception as e:
-                        logger.error(
-                            "Error processing token: {}, Error: {}",
-                            t,
-                            e,
-                        )
-                        raise ValueError(f"Error processing token: {t}, Error: {e}")
-            full_audio_length += audio_length
+        with kokoro_pipelines.acquire(lang_code, voice) as pipeline, AudioWriter(
+            output_path, KOKORO_SAMPLE_RATE
+        ) as writer:
+            generator = pipeline(text, voice=voice, speed=speed)
+
+            for _, result in enumerate(generator):
+                audio_length = writer.write(result.audio)
+                if result.tokens:
+                    tokens = result.tokens
+                    for t in tokens:
+                        if t.start_ts is None or t.end_ts is None:
+                            if captions:
+                                captions[-1]["text"] += t.text
+                                captions[-1]["end_ts"] = full_audio_length + audio_length
+                            continue
+                        try:
+                            captions.append(
+                                {
+                                    "text": t.text,
+                                    "start_ts": full_audio_length + t.start_ts,
+                                    "end_ts": full_audio_length + t.end_ts,
+                                }
+                            )
+                        except Exception as e:
+                            logger.error(
+                                "Error processing token: {}, Error: {}",
+                                t,
+                                e,
+                            )
+                            raise ValueError(f"Error processing token: {t}, Error: {e}")
+                full_audio_length += audio_length
 
-        audio_data = np.concatenate(audio_data)
-        audio_data = np.column_stack((audio_data, audio_data))
-        sf.write(output_path, audio_data, 24000, format="WAV")
         context_logger.bind(
             execution_time=time.time() - start,
             audio_length=full_audio_length,
@@ -363,17 +454,85 @@ class TTS:
         return captions, full_audio_length
 
     def kokoro(
-        self, text: str, output_path: str, voice="af_heart", speed=1
+        self,
+        text: str,
+        output_path: str,
+        voice="af_heart",
+        speed=1,
+        word_timestamps: bool = False,
     ) -> tuple[str, List[dict], float]:
+        """
+        Generates speech with Kokoro. English captions always have word
+        timings; for other languages word_timestamps splits the chunk
+        captions into proportionally timed words.
+        """
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty or whitespace")
+        lang_code = LANGUAGE_VOICE_MAP.get(voice, {}).get("lang_code")
+        if not lang_code:
+            raise ValueError(f"Voice '{voice}' not found in LANGUAGE_VOICE_MAP")
+
+        cache_key, cached = tts_cache.lookup(
+            output_path,
+            engine="kokoro",
+            model=KOKORO_REPO_ID,
+            version=package_version("kokoro"),
+            text=text,
+            voice=voice,
+            speed=speed,
+            word_timestamps=word_timestamps,
+            audio_format=audio_format(output_path),
+        )
+        if cached is not None:
+            logger.bind(voice=voice, text_length=len(text)).debug(
+                "TTS result served from cache"
+            )
+            return cached["captions"], cached["audio_length"]
+
+        if lang_code == "a":
+            captions, audio_length = self.kokoro_english(text, output_path, voice, speed)
+        else:
+            captions, audio_length = self.kokoro_international(
+                text, output_path, voice, lang_code, speed, word_timestamps
+            )
+        tts_cache.store(
+            cache_key,
+            output_path,
+            {"captions": captions, "audio_length": audio_length},
+        )
+        return captions, audio_length
+
+    def kokoro_stream(self, text: str, voice="af_heart", speed=1) -> Iterator:
+        """
+        Generates speech with Kokoro, yielding the mono audio (24kHz float
+        samples) of every chunk as soon as the pipeline produces it. The
+        language lock is only held for the G2P of each sentence, never while
+        the client consumes the audio, so a slow client doesn't block other
+        Kokoro jobs.
+        """
         if not text or not text.strip():
             raise ValueError("Text cannot be empty or whitespace")
         lang_code = LANGUAGE_VOICE_MAP.get(voice, {}).get("lang_code")
         if not lang_code:
             raise ValueError(f"Voice '{voice}' not found in LANGUAGE_VOICE_MAP")
         if lang_code == "a":
-            return self.kokoro_english(text, output_path, voice, speed)
+            sentences = [text]
         else:
-            return self.kokoro_international(text, output_path, voice, lang_code, speed)
+            sentences = self.break_text_into_sentences(text, lang_code)
+
+        logger.bind(voice=voice, speed=speed, text_length=len(text)).debug(
+            "Starting streaming TTS generation with kokoro"
+        )
+        with kokoro_pipelines.acquire_g2p(lang_code) as pipeline:
+            pack = pipeline.load_voice(voice).to(device.type)
+        for sentence in sentences:
+            with kokoro_pipelines.acquire_g2p(lang_code) as pipeline:
+                phonemes = [
+                    result.phonemes
+                    for result in pipeline(sentence, voice=voice, speed=speed)
+                ]
+            for chunk_phonemes in phonemes:
+                yield kokoro_pipelines.synthesize(chunk_phonemes, pack, speed)
 
     def chatterbox(
         self,
@@ -396,31 +555,26 @@ class TTS:
             device=device.type,
         )
         context_logger.debug("starting TTS generation with Chatterbox")
-        model = ChatterboxTTS.from_pretrained(device=device.type)
-
-        if sample_audio_path:
-            wav = model.generate(
-                text,
-                audio_prompt_path=sample_audio_path,
-                exaggeration=exaggeration,
-                cfg_weight=cfg_weight,
-                temperature=temperature,
-            )
-        else:
-            wav = model.generate(
-                text,
-                exaggeration=exaggeration,
-                cfg_weight=cfg_weight,
-                temperature=temperature,
-            )
-
-        if wav.dim() == 2 and wav.shape[0] == 1:
-            wav = wav.repeat(2, 1)
-        elif wav.dim() == 1:
-            wav = wav.unsqueeze(0).repeat(2, 1)
+        with chatterbox_models.acquire() as model:
+            if sample_audio_path:
+                wav = model.generate(
+                    text,
+                    audio_prompt_path=sample_audio_path,
+                    exaggeration=exaggeration,
+                    cfg_weight=cfg_weight,
+                    temperature=temperature,
+                )
+            else:
+                wav = model.generate(
+                    text,
+                    exaggeration=exaggeration,
+                    cfg_weight=cfg_weight,
+                    temperature=temperature,
+                )
 
-        audio_length = wav.shape[1] / model.sr
-        ta.save(output_path, wav, model.sr)
+            wav = wav.reshape(-1)
+            audio_length = wav.shape[0] / model.sr
+            write_audio(output_path, wav, model.sr)
         context_logger.bind(
             execution_time=time.time() - start,
             audio_length=audio_length,
@@ -1,22 +1,132 @@
+import copy
+import hashlib
 import os
+import threading
 import time
 import traceback
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from loguru import logger
-import torchaudio as ta
-from chatterbox.tts import ChatterboxTTS
-from video.config import device
+from chatterbox.tts import ChatterboxTTS, Conditionals
+from chatterbox.models.s3gen import S3GEN_SR
+from video.config import device, chatterbox_conditioning_cache_size
+from video.models import chatterbox_models
+from video.cache import package_version, tts_cache
+from video.audio import AudioWriter, audio_format
 import nltk
 import torch
-from typing import List, Optional
+from typing import Iterator, List, Optional
 
 # Suppress PyTorch warnings
 warnings.filterwarnings("ignore")
 
+class VoiceConditioningCache:
+    """
+    LRU cache of Chatterbox voice conditionings keyed by the content hash of
+    the reference audio and the exaggeration, so a cloned voice is encoded
+    once instead of once per chunk and per request.
+
+    When cache_dir is set, the conditionings are also persisted to disk and
+    survive restarts and memory evictions.
+    """
+
+    def __init__(self, max_entries: int = 16, cache_dir: Optional[str] = None):
+        self.max_entries = max(1, max_entries)
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """Returns the SHA-256 of the file content."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def normalize_exaggeration(exaggeration: float) -> float:
+        """
+        Rounds the exaggeration once for the cache key, prepare_conditionals
+        and generate, so they all see the same value.
+        """
+        return round(float(exaggeration), 4)
+
+    def _disk_path(self, key: tuple) -> str:
+        audio_hash, exaggeration = key
+        return os.path.join(self.cache_dir, f"{audio_hash}_{exaggeration}.pt")
+
+    def get(
+        self, model: ChatterboxTTS, audio_prompt_path: str, exaggeration: float
+    ) -> Conditionals:
+        """
+        Returns the conditioning for the reference audio, computing it with
+        the model only when it is neither in memory nor on disk.
+
+        Every call returns its own copy of the cached entry: generate replaces
+        conds.t3 when the exaggeration it receives differs, which must not
+        change the entry shared with the other replicas.
+        """
+        exaggeration = self.normalize_exaggeration(exaggeration)
+        key = (self.file_hash(audio_prompt_path), exaggeration)
+        context_logger = logger.bind(audio_hash=key[0], exaggeration=key[1])
+
+        with self._lock:
+            conds = self._entries.get(key)
+            if conds is not None:
+                self._entries.move_to_end(key)
+                context_logger.debug("voice conditioning cache hit (memory)")
+                return copy.copy(conds)
+
+        conds = None
+        if self.cache_dir and os.path.exists(self._disk_path(key)):
+            try:
+                conds = Conditionals.load(
+                    self._disk_path(key), map_location=device
+                ).to(device)
+                context_logger.debug("voice conditioning cache hit (disk)")
+            except Exception as e:
+                context_logger.bind(error=str(e)).warning(
+                    "failed to load cached voice conditioning"
+                )
+
+        if conds is None:
+            start = time.time()
+            model.prepare_conditionals(audio_prompt_path, exaggeration=exaggeration)
+            conds = model.conds
+            context_logger.bind(execution_time=time.time() - start).debug(
+                "voice conditioning computed"
+            )
+            if self.cache_dir:
+                try:
+                    conds.save(self._disk_path(key))
+                except Exception as e:
+                    context_logger.bind(error=str(e)).warning(
+                        "failed to persist voice conditioning"
+                    )
+
+        with self._lock:
+            self._entries[key] = conds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return copy.copy(conds)
+
+
 class TTSChatterbox:
-    def __init__(self):
-        """Initialize ChatterboxTTS and ensure NLTK data is available."""
+    def __init__(self, conditioning_cache_dir: Optional[str] = None):
+        """Initialize ChatterboxTTS and ensure NLTK data is available.
+
+        Args:
+            conditioning_cache_dir: Optional directory to persist voice conditionings
+        """
         self.ensure_nltk_data()
+        self.conditioning_cache = VoiceConditioningCache(
+            max_entries=chatterbox_conditioning_cache_size,
+            cache_dir=conditioning_cache_dir,
+        )
         logger.debug("ChatterboxTTS initialized")
 
     def ensure_nltk_data(self):
@@ -120,76 +230,97 @@ class TTSChatterbox:
             logger.error(traceback.format_exc())
             return None
 
-    def text_to_speech_pipeline(
+    def iter_audio_chunks(
         self,
         text: str,
-        model: ChatterboxTTS,
         max_chars_per_chunk: int = 1024,
-        inter_chunk_silence_ms: int = 350,
         audio_prompt_path: Optional[str] = None,
         temperature: float = 0.8,
         cfg_weight: float = 0.5,
         exaggeration: float = 0.5
-    ) -> Optional[torch.Tensor]:
-        """Convert text to speech with chunking support."""
-        try:
-            # Split text into chunks
-            text_chunks = self.split_text_into_chunks(text, max_chars_per_chunk)
-            
-            if not text_chunks:
-                logger.error("No text chunks to process")
-                return None
-            
-            all_audio_tensors = []
-            sample_rate = model.sr
-            
-            logger.debug(f"Processing {len(text_chunks)} chunks at {sample_rate} Hz")
-            
-            for i, chunk_text in enumerate(text_chunks):
-                logger.debug(f"Processing chunk {i+1}/{len(text_chunks)}")
-                
+    ) -> Iterator[Optional[torch.Tensor]]:
+        """
+        Generate the chunks of the text in order, yielding the mono audio of
+        each one (None when its generation failed). A model replica is only
+        held while a chunk is generated; with several replicas the chunks
+        are generated concurrently and still yielded in order. Closing the
+        generator cancels the chunks that haven't started.
+        """
+        text_chunks = self.split_text_into_chunks(text, max_chars_per_chunk)
+        exaggeration = VoiceConditioningCache.normalize_exaggeration(exaggeration)
+        if audio_prompt_path and not os.path.exists(audio_prompt_path):
+            logger.warning(f"Audio prompt path not found: {audio_prompt_path}")
+            audio_prompt_path = None
+
+        def generate(chunk_text: str) -> Optional[torch.Tensor]:
+            with chatterbox_models.acquire() as model:
+                if audio_prompt_path:
+                    model.conds = self.conditioning_cache.get(
+                        model, audio_prompt_path, exaggeration
+                    )
                 chunk_tensor = self.generate_audio_chunk(
                     chunk_text,
                     model,
-                    audio_prompt_path,
+                    None,
                     temperature,
                     cfg_weight,
                     exaggeration
                 )
-                
-                if chunk_tensor is None:
-                    logger.warning(f"Skipping chunk {i+1} due to generation error")
-                    continue
-                
-                all_audio_tensors.append(chunk_tensor)
-                
-                # Add silence between chunks (except after the last chunk)
-                if i < len(text_chunks) - 1 and inter_chunk_silence_ms > 0:
-                    silence_samples = int(sample_rate * inter_chunk_silence_ms / 1000.0)
-                    silence_tensor = torch.zeros(
-                        (1, silence_samples),
-                        dtype=chunk_tensor.dtype,
-                        device=chunk_tensor.device
-                    )
-                    all_audio_tensors.append(silence_tensor)
-            
-            if not all_audio_tensors:
-                logger.error("No audio tensors generated")
-                return None
-            
-            # Concatenate all audio tensors
-            logger.debug("Concatenating audio tensors...")
-            final_audio_tensor = torch.cat(all_audio_tensors, dim=1)
-            
-            logger.debug(f"Final audio shape: {final_audio_tensor.shape}")
-            return final_audio_tensor
-            
-        except Exception as e:
-            logger.error(f"Error in text-to-speech pipeline: {e}")
-            logger.error(traceback.format_exc())
-            return None
+            return None if chunk_tensor is None else chunk_tensor.reshape(-1)
+
+        logger.debug(
+            f"Processing {len(text_chunks)} chunks on {chatterbox_models.replicas} replicas"
+        )
+        if chatterbox_models.replicas > 1:
+            executor = ThreadPoolExecutor(max_workers=chatterbox_models.replicas)
+            try:
+                yield from executor.map(generate, text_chunks)
+            finally:
+                # a closed generator (e.g. a disconnected stream) drops the
+                # chunks not started yet, only the running ones finish
+                executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for chunk_text in text_chunks:
+                yield generate(chunk_text)
+
+    def text_to_speech_stream(
+        self,
+        text: str,
+        max_chars_per_chunk: int = 1024,
+        inter_chunk_silence_ms: int = 350,
+        audio_prompt_path: Optional[str] = None,
+        temperature: float = 0.8,
+        cfg_weight: float = 0.5,
+        exaggeration: float = 0.5
+    ) -> Iterator[torch.Tensor]:
+        """
+        Convert text to speech chunk by chunk, yielding the mono audio of
+        every chunk (at S3GEN_SR) with the inter-chunk silence between them.
+        """
+        silence_tensor = None
+        if inter_chunk_silence_ms > 0:
+            silence_tensor = torch.zeros(int(S3GEN_SR * inter_chunk_silence_ms / 1000.0))
+        generated = False
+        chunks = self.iter_audio_chunks(
+            text,
+            max_chars_per_chunk=max_chars_per_chunk,
+            audio_prompt_path=audio_prompt_path,
+            temperature=temperature,
+            cfg_weight=cfg_weight,
+            exaggeration=exaggeration,
+        )
+        for i, chunk_tensor in enumerate(chunks):
+            if chunk_tensor is None:
+                logger.warning(f"Skipping chunk {i+1} due to generation error")
+                continue
+            if generated and silence_tensor is not None:
+                yield silence_tensor
+            generated = True
+            yield chunk_tensor
+
+        if not generated:
+            raise RuntimeError("Chatterbox failed to generate audio")
 
-    
     def chatterbox(
         self,
         text: str,
@@ -213,37 +344,40 @@ class TTSChatterbox:
             device=device.type,
         )
         context_logger.debug("starting TTS generation with Chatterbox")
-        model = ChatterboxTTS.from_pretrained(device=device.type)
+        cache_key, cached = tts_cache.lookup(
+            output_path,
+            engine="chatterbox",
+            version=package_version("chatterbox-tts"),
+            text=text,
+            sample_audio_hash=(
+                VoiceConditioningCache.file_hash(sample_audio_path)
+                if sample_audio_path
+                else None
+            ),
+            exaggeration=exaggeration,
+            cfg_weight=cfg_weight,
+            temperature=temperature,
+            chunk_chars=chunk_chars,
+            chunk_silence_ms=chunk_silence_ms,
+            audio_format=audio_format(output_path),
+        )
+        if cached is not None:
+            context_logger.debug("TTS result served from cache")
+            return
 
-        if sample_audio_path:
-            wav = self.text_to_speech_pipeline(
+        # chunks are written as they are generated, only one is held in memory
+        with AudioWriter(output_path, S3GEN_SR) as writer:
+            for samples in self.text_to_speech_stream(
                 text,
-                model,
                 audio_prompt_path=sample_audio_path,
                 temperature=temperature,
                 cfg_weight=cfg_weight,
                 exaggeration=exaggeration,
                 max_chars_per_chunk=chunk_chars,
                 inter_chunk_silence_ms=chunk_silence_ms
-            )
-        else:
-            wav = self.text_to_speech_pipeline(
-                text,
-                model,
-                temperature=temperature,
-                cfg_weight=cfg_weight,
-                exaggeration=exaggeration,
-                max_chars_per_chunk=chunk_chars,
-                inter_chunk_silence_ms=chunk_silence_ms
-            )
-
-        if wav.dim() == 2 and wav.shape[0] == 1:
-            wav = wav.repeat(2, 1)
-        elif wav.dim() == 1:
-            wav = wav.unsqueeze(0).repeat(2, 1)
-
-        audio_length = wav.shape[1] / model.sr
-        ta.save(output_path, wav, model.sr)
+            ):
+                writer.write(samples)
+        audio_length = writer.duration
         context_logger.bind(
             execution_time=time.time() - start,
             audio_length=audio_length,
@@ -252,5 +386,6 @@ class TTSChatterbox:
         ).debug(
             "TTS generation with Chatterbox completed",
         )
+        tts_cache.store(cache_key, output_path, {"audio_length": audio_length})
 
 